@@ -1,9 +1,14 @@
 import os
+import asyncio
+from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo import MongoClient
+from pymongo.errors import BulkWriteError
 from typing import Optional
 import logging
 
+from .metrics import timed
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -24,6 +29,12 @@ COLLECTIONS = {
     "feedback": "feedback"
 }
 
+# Write-behind: queue recommendation and feedback inserts and write them in batches
+WRITE_BEHIND_ENABLED = os.getenv("DB_WRITE_BEHIND", "false").lower() == "true"
+WRITE_BEHIND_MAX_QUEUE = int(os.getenv("DB_WRITE_BEHIND_MAX_QUEUE", "10000"))
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv("DB_WRITE_BEHIND_BATCH_SIZE", "500"))
+WRITE_BEHIND_FLUSH_MS = float(os.getenv("DB_WRITE_BEHIND_FLUSH_MS", "200"))
+
 db = Database()
 
 async def connect_to_mongo():
@@ -62,6 +73,8 @@ async def create_indexes():
         # Recommendations collection indexes
         await db.database[COLLECTIONS["recommendations"]].create_index("farm_id")
         await db.database[COLLECTIONS["recommendations"]].create_index("created_at")
+        # Latest recommendation per farm (feedback join in the incremental learning job)
+        await db.database[COLLECTIONS["recommendations"]].create_index([("farm_id", 1), ("created_at", -1)])
         
         # Feedback collection indexes
         await db.database[COLLECTIONS["feedback"]].create_index("farm_id")
@@ -77,16 +90,148 @@ def get_database():
     """Get database instance"""
     return db.database
 
+class WriteBehindQueue:
+    """
+    Bounded in-memory queue of documents written to MongoDB in the background.
+
+    Documents get a client-generated ObjectId when they are enqueued, so the
+    caller can return the id right away. A background task flushes the queue
+    with one insert_many(ordered=False) per collection once `batch_size`
+    documents are waiting or `flush_interval` seconds after the first one
+    arrived. When the queue is full, enqueueing waits for the next flush
+    (backpressure) instead of growing memory. stop() drains what is left.
+    """
+    
+    def __init__(self, database, max_queue=WRITE_BEHIND_MAX_QUEUE,
+                 batch_size=WRITE_BEHIND_BATCH_SIZE, flush_interval=WRITE_BEHIND_FLUSH_MS / 1000):
+        self.database = database
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = asyncio.Queue(maxsize=max_queue)
+        self._task = None
+        
+        self.enqueued = 0
+        self.flushed = 0
+        self.failed = 0
+        self.batches = 0
+        self.in_flight = 0
+        self.backpressure_waits = 0
+    
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+    
+    async def put(self, collection: str, document: dict) -> str:
+        """Queue a document for insertion and return its id"""
+        document.setdefault("_id", ObjectId())
+        if self._queue.full():
+            self.backpressure_waits += 1
+        await self._queue.put((collection, document))
+        self.enqueued += 1
+        return str(document["_id"])
+    
+    async def _next_batch(self):
+        """Wait for a document, then collect more until the batch is full or the interval ends"""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+    
+    async def _insert(self, collection, docs):
+        try:
+            await self.database[collection].insert_many(docs, ordered=False)
+            self.flushed += len(docs)
+        except BulkWriteError as e:
+            # Unordered: everything except the reported errors was written
+            errors = len(e.details.get("writeErrors", []))
+            self.failed += errors
+            self.flushed += len(docs) - errors
+            logger.error(f"Write-behind flush to {collection}: {errors} of {len(docs)} documents failed")
+        except Exception as e:
+            self.failed += len(docs)
+            logger.error(f"Write-behind flush to {collection} failed for {len(docs)} documents: {e}")
+    
+    async def _flush(self, batch):
+        documents = {}
+        for collection, document in batch:
+            documents.setdefault(collection, []).append(document)
+        await asyncio.gather(*(self._insert(collection, docs) for collection, docs in documents.items()))
+        self.batches += 1
+    
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            self.in_flight = len(batch)
+            try:
+                await self._flush(batch)
+            finally:
+                self.in_flight = 0
+                for _ in batch:
+                    self._queue.task_done()
+    
+    async def stop(self):
+        """Flush every queued document, then stop the background task"""
+        if self._task is None:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+    
+    def stats(self) -> dict:
+        return {
+            "enabled": True,
+            "pending": self._queue.qsize() + self.in_flight,
+            "enqueued": self.enqueued,
+            "flushed": self.flushed,
+            "failed": self.failed,
+            "batches": self.batches,
+            "backpressure_waits": self.backpressure_waits,
+            "max_queue": self.max_queue,
+            "batch_size": self.batch_size,
+            "flush_interval_ms": self.flush_interval * 1000
+        }
+
 # Database operations
 class DatabaseOperations:
     def __init__(self):
         self.db = None
+        self.write_behind = None
     
     async def initialize(self):
         """Initialize database connection"""
         await connect_to_mongo()
         self.db = get_database()
+        if WRITE_BEHIND_ENABLED:
+            self.write_behind = WriteBehindQueue(self.db)
+            self.write_behind.start()
+    
+    async def close(self):
+        """Drain pending write-behind documents"""
+        if self.write_behind:
+            await self.write_behind.stop()
+            logger.info(f"Write-behind queue drained: {self.write_behind.stats()}")
+            self.write_behind = None
+    
+    def write_behind_stats(self) -> dict:
+        """Flushed, pending and failed counts of the write-behind queue"""
+        return self.write_behind.stats() if self.write_behind else {"enabled": False}
     
+    @timed("db_operation_duration_seconds")
     async def create_farm(self, farm_data: dict) -> str:
         """Create a new farm record"""
         try:
@@ -96,6 +241,7 @@ class DatabaseOperations:
             logger.error(f"Error creating farm: {e}")
             raise
     
+    @timed("db_operation_duration_seconds")
     async def get_farm(self, farm_id: str) -> dict:
         """Get farm by farm_id"""
         try:
@@ -107,6 +253,7 @@ class DatabaseOperations:
             logger.error(f"Error getting farm: {e}")
             raise
     
+    @timed("db_operation_duration_seconds")
     async def create_soil_report(self, soil_data: dict) -> str:
         """Create a new soil report"""
         try:
@@ -116,6 +263,7 @@ class DatabaseOperations:
             logger.error(f"Error creating soil report: {e}")
             raise
     
+    @timed("db_operation_duration_seconds")
     async def get_latest_soil_report(self, farm_id: str) -> dict:
         """Get latest soil report for a farm"""
         try:
@@ -130,15 +278,19 @@ class DatabaseOperations:
             logger.error(f"Error getting soil report: {e}")
             raise
     
+    @timed("db_operation_duration_seconds")
     async def create_recommendation(self, recommendation_data: dict) -> str:
         """Create a new recommendation record"""
         try:
+            if self.write_behind:
+                return await self.write_behind.put(COLLECTIONS["recommendations"], recommendation_data)
             result = await self.db[COLLECTIONS["recommendations"]].insert_one(recommendation_data)
             return str(result.inserted_id)
         except Exception as e:
             logger.error(f"Error creating recommendation: {e}")
             raise
     
+    @timed("db_operation_duration_seconds")
     async def get_recommendation(self, farm_id: str) -> dict:
         """Get latest recommendation for a farm"""
         try:
@@ -153,6 +305,7 @@ class DatabaseOperations:
             logger.error(f"Error getting recommendation: {e}")
             raise
     
+    @timed("db_operation_duration_seconds")
     async def get_recommendation_history(self, farm_id: str, limit: int = 10) -> list:
         """Get recommendation history for a farm"""
         try:
@@ -170,15 +323,19 @@ class DatabaseOperations:
             logger.error(f"Error getting recommendation history: {e}")
             raise
     
+    @timed("db_operation_duration_seconds")
     async def create_feedback(self, feedback_data: dict) -> str:
         """Create a new feedback record"""
         try:
+            if self.write_behind:
+                return await self.write_behind.put(COLLECTIONS["feedback"], feedback_data)
             result = await self.db[COLLECTIONS["feedback"]].insert_one(feedback_data)
             return str(result.inserted_id)
         except Exception as e:
             logger.error(f"Error creating feedback: {e}")
             raise
     
+    @timed("db_operation_duration_seconds")
     async def get_feedback_stats(self, crop: str = None) -> dict:
         """Get feedback statistics"""
         try:
@@ -230,4 +387,5 @@ async def startup_db_client():
 # Shutdown event handler  
 async def shutdown_db_client():
     """Shutdown database connection"""
+    await database_ops.close()
     await close_mongo_connection()
@@ -6,8 +6,10 @@ import os
 from contextlib import asynccontextmanager
 
 # Import routes
-from .routes import prediction, feedback, farms, chatbot
+from .routes import prediction, feedback, farms, chatbot, admin, monitoring
 from .db import startup_db_client, shutdown_db_client
+from .metrics import MetricsMiddleware
+from .profiling import ProfilingMiddleware
 
 # Configure logging
 logging.basicConfig(
@@ -28,10 +30,17 @@ async def lifespan(app: FastAPI):
         logger.error(f"Failed to connect to database: {e}")
         # Continue startup even if DB connection fails for development
     
+    try:
+        await prediction.startup_prediction_services()
+        logger.info("Prediction services started")
+    except Exception as e:
+        logger.error(f"Failed to start prediction services: {e}")
+    
     yield
     
     # Shutdown
     logger.info("Shutting down Crop Recommendation API...")
+    await prediction.shutdown_prediction_services()
     try:
         await shutdown_db_client()
         logger.info("Database connection closed")
@@ -88,11 +97,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency histograms (see /metrics)
+app.add_middleware(MetricsMiddleware)
+
+# On-demand request profiling (X-Profile-Token header or PROFILE_SAMPLE_RATE)
+app.add_middleware(ProfilingMiddleware)
+
 # Include routers
 app.include_router(prediction.router)
 app.include_router(feedback.router)
 app.include_router(farms.router)
 app.include_router(chatbot.router)
+app.include_router(admin.router)
+app.include_router(monitoring.router)
 
 # Root endpoint
 @app.get("/")
@@ -109,6 +126,8 @@ async def root():
             "recommendations": "/api/recommendation/{farm_id}",
             "farms": "/api/farms",
             "chatbot": "/api/chatbot",
+            "admin": "/api/admin/models",
+            "metrics": "/metrics",
             "health": "/health"
         }
     }
@@ -0,0 +1,238 @@
+import bisect
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Set METRICS_ENABLED=false to turn off all recording (the endpoints then report nothing)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+# Histogram bucket upper bounds in seconds, 100us .. 10s
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+# Histograms of counts rather than seconds, with their own bucket bounds
+COUNT_BUCKETS = {
+    "early_exit_trees_evaluated": (5, 10, 20, 40, 60, 80, 100, 150, 200, 300, 500)
+}
+
+METRIC_HELP = {
+    "http_request_duration_seconds": "Time from request received to response finished, per route",
+    "stage_duration_seconds": "Time spent in each stage of a request handler",
+    "model_stage_duration_seconds": "Time spent in each stage of model inference",
+    "db_operation_duration_seconds": "Time spent in each DatabaseOperations method",
+    "early_exit_trees_evaluated": "Trees evaluated per row by early-exit inference"
+}
+
+class Histogram:
+    """Fixed-bucket latency histogram; observe() is a bisect and a few increments"""
+
+    __slots__ = ("buckets", "counts", "count", "sum", "max", "_lock")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        # One extra slot for observations above the last bound (+Inf)
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def quantile(self, q):
+        """Estimate a quantile by linear interpolation inside its bucket"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.max
+                estimate = lower + (upper - lower) * (rank - cumulative) / bucket_count
+                return min(estimate, self.max)
+            cumulative += bucket_count
+        return self.max
+
+class MetricsRegistry:
+    """
+    In-process histograms keyed by metric name and label values.
+
+    Exported in Prometheus text format and as a JSON summary with
+    estimated percentiles.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, enabled=True):
+        self.buckets = buckets
+        self.enabled = enabled
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name, **labels):
+        # Call sites pass labels in a fixed order, so the key needs no sorting
+        key = (name, tuple(labels.items()))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram(COUNT_BUCKETS.get(name, self.buckets)))
+        return histogram
+
+    def observe(self, name, seconds, **labels):
+        if self.enabled:
+            self.histogram(name, **labels).observe(seconds)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Time the enclosed block into a histogram"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def _snapshot(self):
+        with self._lock:
+            return sorted(self._histograms.items())
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def render_prometheus(self):
+        """All histograms in the Prometheus text exposition format"""
+        lines = []
+        snapshot = self._snapshot()
+        for name in sorted({name for (name, _), _ in snapshot}):
+            lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} histogram")
+            for (metric, labels), histogram in snapshot:
+                if metric != name:
+                    continue
+                label_text = ",".join(f'{key}="{value}"' for key, value in labels)
+                prefix = label_text + "," if label_text else ""
+                cumulative = 0
+                for bound, bucket_count in zip(histogram.buckets, histogram.counts):
+                    cumulative += bucket_count
+                    lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {histogram.count}')
+                lines.append(f"{name}_sum{{{label_text}}} {histogram.sum}")
+                lines.append(f"{name}_count{{{label_text}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """Count, mean and p50/p95/p99/max for every histogram, in milliseconds for durations"""
+        summary = {}
+        for (name, labels), histogram in self._snapshot():
+            if not histogram.count:
+                continue
+            scale, suffix = (1, "") if name in COUNT_BUCKETS else (1000, "_ms")
+            summary.setdefault(name, []).append({
+                "labels": dict(labels),
+                "count": histogram.count,
+                f"mean{suffix}": round(histogram.sum / histogram.count * scale, 3),
+                f"p50{suffix}": round(histogram.quantile(0.50) * scale, 3),
+                f"p95{suffix}": round(histogram.quantile(0.95) * scale, 3),
+                f"p99{suffix}": round(histogram.quantile(0.99) * scale, 3),
+                f"max{suffix}": round(histogram.max * scale, 3)
+            })
+        return summary
+
+# Global metrics registry
+metrics = MetricsRegistry(enabled=METRICS_ENABLED)
+
+# Timing state of the request being handled (set by MetricsMiddleware)
+_request_timing = ContextVar("request_timing", default=None)
+
+def _route_label(scope):
+    """Route template (e.g. /api/recommendation/{farm_id}) so labels stay low-cardinality"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+@contextmanager
+def stage(name):
+    """Time a stage of the current request handler, labelled with its route"""
+    timing = _request_timing.get()
+    route = _route_label(timing["scope"]) if timing else "none"
+    with metrics.timer("stage_duration_seconds", route=route, stage=name):
+        yield
+
+def timed_handler(func):
+    """
+    Mark where a route handler starts and ends
+
+    The time before the handler starts is recorded as the "validation" stage
+    (body parsing, pydantic validation and dependencies). The time from its
+    return to the response being sent is the "serialization" stage.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        timing = _request_timing.get()
+        if timing is None:
+            return await func(*args, **kwargs)
+
+        started = time.perf_counter()
+        metrics.observe("stage_duration_seconds", started - timing["start"],
+                        route=_route_label(timing["scope"]), stage="validation")
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            timing["handler_end"] = time.perf_counter()
+    return wrapper
+
+def timed(name, label="operation"):
+    """Decorator recording each call of an async function, labelled with the function name"""
+    def decorator(func):
+        labels = {label: func.__name__}
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                metrics.observe(name, time.perf_counter() - start, **labels)
+        return wrapper
+    return decorator
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording the duration of every HTTP request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not metrics.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        timing = {"start": time.perf_counter(), "scope": scope, "handler_end": None}
+        token = _request_timing.set(timing)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if timing["handler_end"] is not None:
+                    metrics.observe("stage_duration_seconds", time.perf_counter() - timing["handler_end"],
+                                    route=_route_label(scope), stage="serialization")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            metrics.observe("http_request_duration_seconds", time.perf_counter() - timing["start"],
+                            method=scope["method"], route=_route_label(scope), status=str(status))
+            _request_timing.reset(token)
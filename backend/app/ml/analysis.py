@@ -0,0 +1,150 @@
+import json
+import os
+
+import numpy as np
+
+# Optional JSON file overriding DEFAULT_ANALYSIS_CONFIG (same shape, partial is fine)
+ANALYSIS_CONFIG = os.getenv("ANALYSIS_CONFIG")
+
+FEATURE_NAMES = ['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall']
+
+# A factor scores 1 inside its optimal range, 0.5 inside its acceptable range,
+# 0 elsewhere. Soil factors have no acceptable band.
+DEFAULT_ANALYSIS_CONFIG = {
+    "soil": {
+        "N": {"optimal": [40, 120]},
+        "P": {"optimal": [20, 60]},
+        "K": {"optimal": [20, 60]},
+        "ph": {"optimal": [6.0, 7.5]}
+    },
+    "weather": {
+        "temperature": {"optimal": [20, 30], "acceptable": [15, 35]},
+        "humidity": {"optimal": [50, 80], "acceptable": [40, 90]},
+        "rainfall": {"optimal": [100, 300], "acceptable": [50, 400]}
+    },
+    # Score percentage needed for level 1, 2 and 3
+    "level_thresholds": [40, 60, 80]
+}
+
+SOIL_LABELS = ["Poor", "Fair", "Good", "Excellent"]
+WEATHER_LABELS = ["Poor", "Moderate", "Good", "Excellent"]
+RISK_MATRIX = [
+    # weather: Poor, Moderate, Good, Excellent
+    ["Very High", "High", "High", "Medium"],   # soil: Poor
+    ["High", "Medium", "Medium", "Medium"],    # soil: Fair
+    ["Medium", "Medium", "Low", "Low"],        # soil: Good
+    ["Medium", "Low", "Low", "Very Low"]       # soil: Excellent
+]
+
+def load_analysis_config(path=ANALYSIS_CONFIG):
+    """DEFAULT_ANALYSIS_CONFIG with the ranges of the JSON file at `path` merged in"""
+    config = json.loads(json.dumps(DEFAULT_ANALYSIS_CONFIG))
+    if path:
+        with open(path) as f:
+            overrides = json.load(f)
+        for group in ("soil", "weather"):
+            for name, ranges in overrides.get(group, {}).items():
+                if name not in FEATURE_NAMES:
+                    raise ValueError(f"Unknown feature in analysis config: {name}")
+                config[group].setdefault(name, {}).update(ranges)
+        config["level_thresholds"] = overrides.get("level_thresholds", config["level_thresholds"])
+    return config
+
+class AnalysisEngine:
+    """
+    Soil health, weather suitability and risk level in a single pass.
+
+    The configured ranges are compiled into per-feature bound arrays, so a
+    batch is scored with two range masks over the whole N x 7 feature array,
+    one matrix product for the per-group scores and a table lookup for the
+    risk. Single rows go through the same tables with a plain loop, which is
+    cheaper than NumPy call overhead on one row.
+    """
+
+    def __init__(self, config=None, feature_names=FEATURE_NAMES):
+        config = config or load_analysis_config()
+        self.feature_names = list(feature_names)
+        n_features = len(self.feature_names)
+
+        # Empty ranges (lower > upper) never match
+        self.optimal_low = np.full(n_features, np.inf)
+        self.optimal_high = np.full(n_features, -np.inf)
+        self.acceptable_low = np.full(n_features, np.inf)
+        self.acceptable_high = np.full(n_features, -np.inf)
+        # weights[i, g] = 1 when feature i is a factor of group g (0 soil, 1 weather)
+        self.weights = np.zeros((n_features, 2))
+
+        for group_index, group in enumerate(("soil", "weather")):
+            for name, ranges in config[group].items():
+                i = self.feature_names.index(name)
+                self.optimal_low[i], self.optimal_high[i] = ranges["optimal"]
+                acceptable = ranges.get("acceptable", ranges["optimal"])
+                self.acceptable_low[i], self.acceptable_high[i] = acceptable
+                self.weights[i, group_index] = 1.0
+
+        self.factor_counts = self.weights.sum(axis=0)
+        self.thresholds = np.asarray(config["level_thresholds"], dtype=float)
+
+        # Scalar tables for single rows: (name, group, optimal, acceptable) per factor
+        self._factors = [
+            (name, int(self.weights[i, 1]),
+             (float(self.optimal_low[i]), float(self.optimal_high[i])),
+             (float(self.acceptable_low[i]), float(self.acceptable_high[i])))
+            for i, name in enumerate(self.feature_names) if self.weights[i].any()
+        ]
+        self._thresholds = [float(t) for t in config["level_thresholds"]]
+        self._counts = [float(c) for c in self.factor_counts]
+        # Result of every (soil, weather) level pair, indexed by soil * 4 + weather
+        self._results = [
+            {"soil_health": soil_label, "weather_suitability": weather_label, "risk_level": RISK_MATRIX[soil][weather]}
+            for soil, soil_label in enumerate(SOIL_LABELS)
+            for weather, weather_label in enumerate(WEATHER_LABELS)
+        ]
+
+    def levels(self, X):
+        """
+        Soil health and weather suitability level of every row (0=Poor .. 3=Excellent)
+
+        Args:
+            X: N x 7 feature array in feature_names order
+
+        Returns:
+            tuple: (soil levels, weather levels) integer arrays
+        """
+        X = np.asarray(X, dtype=float)
+        optimal = (X >= self.optimal_low) & (X <= self.optimal_high)
+        acceptable = (X >= self.acceptable_low) & (X <= self.acceptable_high)
+        points = np.where(optimal, 1.0, np.where(acceptable, 0.5, 0.0))
+
+        percentage = (points @ self.weights) / self.factor_counts * 100
+        levels = (percentage[:, :, None] >= self.thresholds).sum(axis=2)
+        return levels[:, 0], levels[:, 1]
+
+    def analyze(self, X):
+        """Soil health, weather suitability and risk level dict for every row of X"""
+        soil, weather = self.levels(X)
+        results = self._results
+        # Copies, since callers add fields to their row's dict
+        return [results[combination].copy() for combination in (soil * 4 + weather).tolist()]
+
+    def assess(self, features):
+        """Soil health, weather suitability and risk level of one feature dict"""
+        scores = [0.0, 0.0]
+        for name, group, (optimal_low, optimal_high), (acceptable_low, acceptable_high) in self._factors:
+            value = features[name]
+            if optimal_low <= value <= optimal_high:
+                scores[group] += 1
+            elif acceptable_low <= value <= acceptable_high:
+                scores[group] += 0.5
+
+        soil = weather = 0
+        soil_percentage = scores[0] / self._counts[0] * 100
+        weather_percentage = scores[1] / self._counts[1] * 100
+        for threshold in self._thresholds:
+            soil += soil_percentage >= threshold
+            weather += weather_percentage >= threshold
+
+        return self._results[soil * 4 + weather].copy()
+
+# Global analysis engine
+analysis_engine = AnalysisEngine()
@@ -0,0 +1,152 @@
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .inference import InferenceModel
+
+DEFAULT_CHUNK_SIZE = 100000
+
+# Model of a scoring worker, set once by the pool initializer
+_score_model = None
+
+def _init_score_worker(model_dir, engine):
+    global _score_model
+    _score_model = InferenceModel(engine=engine, model_dir=model_dir)
+    if not _score_model.load_model():
+        raise RuntimeError(f"Could not load a model from {model_dir}")
+
+def _score_chunk(feature_array):
+    """Top 3 class indices and scores for every row of a chunk"""
+    probabilities = _score_model.predict_proba(feature_array)
+    top = np.argsort(probabilities, axis=1)[:, ::-1][:, :3]
+    return top.astype(np.int16), np.take_along_axis(probabilities, top, axis=1)
+
+class ChunkWriter:
+    """Append scored chunks to a CSV or Parquet file as they arrive"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.format = "parquet" if self.path.suffix in (".parquet", ".pq") else "csv"
+        self._parquet = None
+        self._header = True
+        if self.format == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise RuntimeError("Parquet output needs pyarrow (pip install pyarrow); use a .csv output instead")
+        elif self.path.exists():
+            self.path.unlink()
+
+    def write(self, df):
+        if self.format == "csv":
+            df.to_csv(self.path, mode="a", header=self._header, index=False)
+            self._header = False
+            return
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self._parquet is None:
+            self._parquet = pq.ParquetWriter(self.path, table.schema)
+        self._parquet.write_table(table)
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+
+def bulk_score(input_path, output_path, model_dir=None, engine="sklearn",
+               chunk_size=DEFAULT_CHUNK_SIZE, workers=None, keep_columns=()):
+    """
+    Score a CSV of soil samples chunk by chunk and write the top 3 crops per row
+
+    At most 2 x workers chunks are in flight, and results are written in input
+    order as soon as they are ready, so memory does not grow with file size.
+
+    Args:
+        input_path: CSV with at least the feature columns (N, P, K, temperature, humidity, ph, rainfall)
+        output_path: .csv or .parquet output (Parquet needs pyarrow)
+        model_dir: Model artifact directory (defaults to the bundled model)
+        engine (str): Inference engine used by the workers
+        chunk_size (int): Rows read and scored per task
+        workers (int): Scoring processes (default all cores)
+        keep_columns (iterable): Input columns copied to the output (e.g. an id column)
+
+    Returns:
+        dict: Rows scored, seconds and rows per second
+    """
+    model = InferenceModel(engine=engine, model_dir=model_dir)
+    if not model.load_model():
+        raise RuntimeError("No trained model to score with")
+    classes = np.asarray(model.classes).astype(str)
+    feature_names = model.feature_names
+    keep_columns = list(keep_columns)
+    workers = workers or os.cpu_count() or 1
+
+    reader = pd.read_csv(input_path, usecols=feature_names + keep_columns, chunksize=chunk_size)
+    writer = ChunkWriter(output_path)
+    rows = 0
+    started = time.perf_counter()
+
+    def write_result(future, kept):
+        top, scores = future.result()
+        out = kept.reset_index(drop=True)
+        for rank in range(top.shape[1]):
+            out[f"crop_{rank + 1}"] = classes[top[:, rank]]
+            out[f"score_{rank + 1}"] = scores[:, rank]
+        writer.write(out)
+        return len(out)
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_score_worker,
+                                 initargs=(str(model.model_path.parent), engine)) as pool:
+            pending = deque()
+            for chunk in reader:
+                feature_array = chunk[feature_names].to_numpy(dtype=float)
+                pending.append((pool.submit(_score_chunk, feature_array), chunk[keep_columns]))
+                # Bounded read-ahead: wait for the oldest chunk before reading more
+                if len(pending) >= 2 * workers:
+                    rows += write_result(*pending.popleft())
+                    elapsed = time.perf_counter() - started
+                    print(f"{rows:,} rows scored ({rows / elapsed:,.0f} rows/s)", flush=True)
+            while pending:
+                rows += write_result(*pending.popleft())
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - started
+    report = {
+        "rows": rows,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows / elapsed) if elapsed else None,
+        "workers": workers,
+        "chunk_size": chunk_size,
+        "output": str(output_path)
+    }
+    print(f"Scored {rows:,} rows in {elapsed:.1f} s ({report['rows_per_second']:,} rows/s) -> {output_path}")
+    return report
+
+# Score a file from the command line
+if __name__ == "__main__":
+    from .registry import ModelRegistry
+
+    parser = argparse.ArgumentParser(description="Score a large CSV of soil samples with the top 3 crops per row")
+    parser.add_argument("input", help="CSV with N, P, K, temperature, humidity, ph and rainfall columns")
+    parser.add_argument("output", help="Output file; .parquet (needs pyarrow) or .csv")
+    parser.add_argument("--version", help="Registry version (defaults to the bundled model)")
+    parser.add_argument("--engine", choices=["sklearn", "compiled"], default="sklearn",
+                        help="sklearn is fastest on large chunks")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, help="Scoring processes (defaults to all cores)")
+    parser.add_argument("--keep", default="", help="Comma-separated input columns copied to the output")
+    args = parser.parse_args()
+
+    model_dir = ModelRegistry().version_dir(args.version) if args.version else None
+    bulk_score(args.input, args.output, model_dir=model_dir, engine=args.engine,
+               chunk_size=args.chunk_size, workers=args.workers,
+               keep_columns=[name for name in args.keep.split(",") if name])
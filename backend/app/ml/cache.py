@@ -0,0 +1,154 @@
+import os
+import time
+from collections import OrderedDict
+
+# Default quantization step per feature: readings closer than this share a cache entry
+DEFAULT_PRECISIONS = {
+    'N': 1.0,
+    'P': 1.0,
+    'K': 1.0,
+    'temperature': 0.1,
+    'humidity': 0.1,
+    'ph': 0.01,
+    'rainfall': 0.1
+}
+
+def parse_precisions(spec):
+    """Parse "N=1,ph=0.05" into a precision dict on top of DEFAULT_PRECISIONS"""
+    precisions = dict(DEFAULT_PRECISIONS)
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        name, _, step = item.partition("=")
+        if name.strip() not in precisions:
+            raise ValueError(f"Unknown feature in cache precision: {name}")
+        precisions[name.strip()] = float(step)
+    return precisions
+
+class PredictionCache:
+    """
+    LRU cache with TTL for top 3 predictions, keyed on quantized input features.
+
+    The cache is dropped whenever the model artifacts on disk change, so a
+    retrained model never serves stale predictions.
+    """
+
+    def __init__(self, precisions=None, max_entries=10000, ttl_seconds=300.0,
+                 watched_files=(), check_interval=1.0):
+        """
+        Args:
+            precisions (dict): Quantization step per feature name
+            max_entries (int): Maximum number of cached predictions
+            ttl_seconds (float): How long an entry stays valid
+            watched_files (iterable): Model artifact paths; any change clears the cache
+            check_interval (float): Minimum seconds between artifact stat() checks
+        """
+        self.precisions = dict(precisions or DEFAULT_PRECISIONS)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.watched_files = list(watched_files)
+        self.check_interval = check_interval
+
+        self._entries = OrderedDict()
+        # Bumped by invalidate(); results computed before that are not stored
+        self.generation = 0
+        self._file_signature = self._current_signature()
+        self._next_check = time.monotonic() + check_interval
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.stale_puts = 0
+
+    def _current_signature(self):
+        signature = []
+        for path in self.watched_files:
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append(None)
+        return signature
+
+    def _check_model_files(self, now):
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+
+        signature = self._current_signature()
+        if signature != self._file_signature:
+            self._file_signature = signature
+            self.invalidate()
+
+    def watch(self, files):
+        """Switch the watched model artifacts (e.g. after a hot swap) and start empty"""
+        self.watched_files = list(files)
+        self._file_signature = self._current_signature()
+        self.invalidate()
+
+    def key(self, features):
+        """Quantized cache key for a feature dict"""
+        return tuple(round(features[name] / step) for name, step in self.precisions.items())
+
+    def get(self, features):
+        """Cached prediction for these features, or None"""
+        now = time.monotonic()
+        self._check_model_files(now)
+
+        key = self.key(features)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= now:
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, features, value, generation=None):
+        """
+        Store a prediction, evicting the least recently used entry when full
+
+        Args:
+            generation (int): `generation` read before the prediction was computed;
+                if the cache was invalidated since (e.g. a model swap), it is dropped
+        """
+        if generation is not None and generation != self.generation:
+            self.stale_puts += 1
+            return
+        key = self.key(features)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self):
+        """Drop every cached prediction"""
+        self._entries.clear()
+        self.generation += 1
+        self.invalidations += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "precisions": self.precisions,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "stale_puts": self.stale_puts
+        }
@@ -0,0 +1,152 @@
+import argparse
+import json
+import os
+import time
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from .compiled_forest import CompiledForest
+from .grid import FEATURE_BOUNDS
+from .model import CropRecommendationModel, DEFAULT_DATASET
+
+REPORT_FILE = 'compact_report.json'
+
+def export_compact(model, threshold_dtype="float32", value_dtype="uint8", path=None):
+    """
+    Write a reduced-precision copy of a random forest model
+
+    The artifact has the layout of compiled_model.joblib, so it is loaded
+    (and memory-mapped) by load_compiled_model and served by CompiledForest.
+
+    Args:
+        model (CropRecommendationModel): Loaded random forest model
+        threshold_dtype (str): float32 (exact splits) or float16
+        value_dtype (str): uint8, uint16 or float16 leaf probabilities
+        path: Output file (defaults to compact_model.joblib next to the model)
+
+    Returns:
+        CompiledForest: The exported forest
+    """
+    if not isinstance(model.model, RandomForestClassifier):
+        raise ValueError("Compact export needs a random forest model (MODEL_TYPE=random_forest)")
+
+    forest = CompiledForest.from_sklearn(model.model).quantize(threshold_dtype, value_dtype)
+    artifact = {
+        "forest": forest.to_arrays(),
+        "classes": np.asarray(model.classes),
+        "feature_names": model.feature_names,
+        "feature_importances": np.asarray(model.feature_importances, dtype=np.float32),
+        "format": {"threshold_dtype": str(np.dtype(threshold_dtype)), "value_dtype": str(np.dtype(value_dtype))}
+    }
+    path = path or model.compact_path
+    joblib.dump(artifact, path, compress=0)
+    print(f"Compact model saved to {path}")
+    return forest
+
+def sklearn_nbytes(forest):
+    """Memory held by the node and value arrays of a fitted sklearn forest"""
+    return sum(
+        estimator.tree_.__getstate__()["nodes"].nbytes + estimator.tree_.value.nbytes
+        for estimator in forest.estimators_
+    )
+
+def drift_report(reference, candidate, X, y=None):
+    """How far the candidate's probabilities and rankings are from the reference on the rows of X"""
+    reference_proba = reference.predict_proba(X)
+    candidate_proba = candidate.predict_proba(X)
+    reference_top = np.argsort(reference_proba, axis=1)[:, ::-1][:, :3]
+    candidate_top = np.argsort(candidate_proba, axis=1)[:, ::-1][:, :3]
+    difference = np.abs(candidate_proba - reference_proba)
+    # Crops tied in the reference may be ranked either way, so compare the reference scores of each pick
+    agrees = np.take_along_axis(reference_proba, candidate_top, axis=1) == \
+        np.take_along_axis(reference_proba, reference_top, axis=1)
+
+    report = {
+        "rows": len(X),
+        "top1_agreement": round(float(agrees[:, 0].mean()), 4),
+        "top3_order_agreement": round(float(agrees.all(axis=1).mean()), 4),
+        "mean_abs_proba_error": round(float(difference.mean()), 6),
+        "max_abs_proba_error": round(float(difference.max()), 6)
+    }
+    if y is not None:
+        report["reference_accuracy"] = round(float((reference_top[:, 0] == y).mean()), 4)
+        report["accuracy"] = round(float((candidate_top[:, 0] == y).mean()), 4)
+    return report
+
+def compare_compact(model, compact_model, n_random=100000, seed=0):
+    """
+    Artifact size, loaded memory and accuracy drift of the compact model
+
+    Args:
+        model (CropRecommendationModel): Full-precision model (sklearn loaded)
+        compact_model (CropRecommendationModel): Model loaded from the compact artifact
+
+    Returns:
+        dict: Sizes in bytes and drift on the dataset and on uniform random inputs
+    """
+    artifacts = {}
+    for name, path in (("sklearn", model.model_path), ("compiled", model.compiled_path), ("compact", model.compact_path)):
+        artifacts[name] = os.path.getsize(path) if path.exists() else None
+
+    compiled = CompiledForest.from_sklearn(model.model)
+    loaded = {
+        "sklearn": sklearn_nbytes(model.model),
+        "compiled": compiled.nbytes,
+        "compact": compact_model.compiled_forest.nbytes
+    }
+
+    df = model.load_data(DEFAULT_DATASET)
+    rng = np.random.default_rng(seed)
+    low, high = np.array(list(FEATURE_BOUNDS.values()), dtype=float).T
+    X_random = rng.uniform(low, high, (n_random, len(low)))
+
+    drift = {"uniform_random": drift_report(model.model, compact_model, X_random)}
+    if df is not None:
+        X = df[model.feature_names].to_numpy(dtype=float)
+        y = np.searchsorted(model.classes, df["label"].to_numpy())
+        drift["dataset"] = drift_report(model.model, compact_model, X, y)
+
+    latency = {}
+    for name, candidate in (("compiled", compiled), ("compact", compact_model.compiled_forest)):
+        started = time.perf_counter()
+        candidate.predict_proba(X_random[:1024])
+        latency[name] = round((time.perf_counter() - started) * 1000, 3)
+
+    return {
+        "artifact_bytes": artifacts,
+        "loaded_bytes": loaded,
+        "predict_proba_1024_ms": latency,
+        "drift": drift
+    }
+
+# Export the bundled model or a registry version from the command line
+if __name__ == "__main__":
+    from .registry import ModelRegistry
+
+    parser = argparse.ArgumentParser(description="Export the random forest in reduced precision and report the drift")
+    parser.add_argument("--version", help="Registry version (defaults to the bundled model)")
+    parser.add_argument("--threshold-dtype", choices=["float32", "float16"], default="float32")
+    parser.add_argument("--value-dtype", choices=["uint8", "uint16", "float16"], default="uint8")
+    parser.add_argument("--samples", type=int, default=100000, help="Random rows for the drift report")
+    args = parser.parse_args()
+
+    model = ModelRegistry().model_for(args.version) if args.version else CropRecommendationModel()
+    model.use_mmap = model.use_compact = False
+    if not model.load_model():
+        raise SystemExit(1)
+
+    export_compact(model, args.threshold_dtype, args.value_dtype)
+    compact_model = CropRecommendationModel(model_dir=model.compact_path.parent)
+    if not compact_model.load_compiled_model(path=model.compact_path):
+        raise SystemExit(1)
+
+    report = {
+        "threshold_dtype": args.threshold_dtype,
+        "value_dtype": args.value_dtype,
+        **compare_compact(model, compact_model, args.samples)
+    }
+    with open(model.compact_path.parent / REPORT_FILE, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
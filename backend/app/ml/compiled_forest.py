@@ -0,0 +1,340 @@
+import threading
+
+import numpy as np
+
+class CompiledForest:
+    """
+    A trained RandomForestClassifier flattened into contiguous NumPy arrays.
+
+    All trees share one set of node arrays. Leaves point back to themselves,
+    so every row can step through every tree level by level for `max_depth`
+    iterations without any per-tree Python loop.
+    """
+
+    def __init__(self, feature, threshold, children, value, roots, max_depth, n_features, value_scale=1.0):
+        """
+        Args:
+            feature (ndarray): Split feature per node (0 for leaves)
+            threshold (ndarray): Split threshold per node; rows go left when x <= threshold
+            children (ndarray): n_nodes x 2 array of (left, right) child indices
+            value (ndarray): n_nodes x n_classes class distribution per node (rows sum to 1)
+            roots (ndarray): Root node index of each tree
+            max_depth (int): Depth of the deepest tree
+            n_features (int): Number of input features
+            value_scale (float): Multiplier turning quantized (integer) values into probabilities
+        """
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.n_features = int(n_features)
+        self.value_scale = float(value_scale)
+        self._contributions = None
+        self._contributions_lock = threading.Lock()
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_classes(self):
+        return self.value.shape[1]
+
+    @property
+    def is_leaf(self):
+        return self.children[:, 0] == np.arange(len(self.children))
+
+    @property
+    def nbytes(self):
+        """Memory held by the node arrays"""
+        return sum(array.nbytes for array in (self.feature, self.threshold, self.children, self.value, self.roots))
+
+    def _node_proba(self):
+        """Class distribution per node as float64 probabilities"""
+        if self.value_scale == 1.0:
+            return self.value
+        return self.value * self.value_scale
+
+    @classmethod
+    def from_sklearn(cls, forest):
+        """Compile a fitted sklearn RandomForestClassifier"""
+        features, thresholds, children, values, roots = [], [], [], [], []
+        offset = 0
+
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            node_ids = np.arange(tree.node_count)
+            leaf = tree.children_left == -1
+
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(np.where(leaf, 0.0, tree.threshold))
+            children.append(np.stack([
+                np.where(leaf, node_ids, tree.children_left) + offset,
+                np.where(leaf, node_ids, tree.children_right) + offset
+            ], axis=1))
+
+            # Same normalisation as DecisionTreeClassifier.predict_proba
+            value = tree.value[:, 0, :].astype(np.float64)
+            normalizer = value.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+            values.append(value / normalizer)
+
+            roots.append(offset)
+            offset += tree.node_count
+
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(features), dtype=np.intp),
+            threshold=np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64),
+            children=np.ascontiguousarray(np.concatenate(children), dtype=np.intp),
+            value=np.ascontiguousarray(np.concatenate(values)),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max(estimator.tree_.max_depth for estimator in forest.estimators_),
+            n_features=forest.n_features_in_
+        )
+
+    def to_arrays(self):
+        """Plain dict of arrays, suitable for an uncompressed (mmap-able) joblib dump"""
+        return {
+            "feature": self.feature,
+            "threshold": self.threshold,
+            "children": self.children,
+            "value": self.value,
+            "roots": self.roots,
+            "max_depth": self.max_depth,
+            "n_features": self.n_features,
+            "value_scale": self.value_scale
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Rebuild from to_arrays() output; memory-mapped arrays are used as-is"""
+        return cls(**arrays)
+
+    def quantize(self, threshold_dtype="float32", value_dtype="uint8"):
+        """
+        Copy of this forest in reduced precision, served by the same methods
+
+        Node indices are stored as int16 when the forest is small enough
+        (int32 otherwise) and split features as uint8. float32 thresholds are
+        rounded down, which gives exactly the same splits, since inputs are
+        compared as float32 anyway. float16 thresholds are approximate.
+        Integer value dtypes store each probability as round(p * max) with
+        value_scale = 1 / max (uint8: steps of 1/255). float16 values are
+        stored as they are.
+
+        Args:
+            threshold_dtype (str): float32 or float16
+            value_dtype (str): uint8, uint16 or float16
+
+        Returns:
+            CompiledForest: The reduced-precision forest
+        """
+        threshold_dtype, value_dtype = np.dtype(threshold_dtype), np.dtype(value_dtype)
+        if threshold_dtype not in (np.float32, np.float16):
+            raise ValueError(f"Unsupported threshold dtype: {threshold_dtype}")
+        if value_dtype not in (np.uint8, np.uint16, np.float16):
+            raise ValueError(f"Unsupported value dtype: {value_dtype}")
+
+        # apply() computes 2 * node + 1, which must still fit the index dtype
+        index_dtype = np.int16 if 2 * len(self.children) < np.iinfo(np.int16).max else np.int32
+
+        # Largest threshold of the new dtype not above the original keeps x <= threshold unchanged
+        threshold = self.threshold.astype(threshold_dtype)
+        rounded_up = threshold.astype(np.float64) > self.threshold
+        threshold[rounded_up] = np.nextafter(threshold[rounded_up], threshold_dtype.type(-np.inf))
+
+        proba = self._node_proba()
+        if value_dtype.kind == "u":
+            levels = np.iinfo(value_dtype).max
+            value, value_scale = np.rint(proba * levels).astype(value_dtype), 1.0 / levels
+        else:
+            value, value_scale = proba.astype(value_dtype), 1.0
+
+        return CompiledForest(
+            feature=self.feature.astype(np.uint8),
+            threshold=threshold,
+            children=self.children.astype(index_dtype),
+            value=np.ascontiguousarray(value),
+            roots=self.roots.astype(index_dtype),
+            max_depth=self.max_depth,
+            n_features=self.n_features,
+            value_scale=value_scale
+        )
+
+    def apply(self, X, trees=None):
+        """
+        Leaf index reached by every row in every tree
+
+        Args:
+            X (ndarray): n_rows x n_features input
+            trees (slice or ndarray): Subset of trees to evaluate (default all)
+
+        Returns:
+            ndarray: n_rows x n_trees array of leaf node indices
+        """
+        # sklearn compares float32 inputs against float64 thresholds
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        roots = self.roots if trees is None else self.roots[trees]
+        n_rows = X.shape[0]
+
+        # Flat indexing: X[row, feature] -> X_flat[row * n_features + feature],
+        # children[node, go_right] -> children_flat[2 * node + go_right]
+        X_flat = X.ravel()
+        row_offsets = (np.arange(n_rows) * X.shape[1])[:, None]
+        children_flat = self.children.ravel()
+
+        nodes = np.broadcast_to(roots, (n_rows, len(roots))).copy()
+
+        for _ in range(self.max_depth):
+            x = np.take(X_flat, row_offsets + np.take(self.feature, nodes))
+            go_right = x > np.take(self.threshold, nodes)
+            nodes = np.take(children_flat, 2 * nodes + go_right)
+
+        return nodes
+
+    @property
+    def bias(self):
+        """Average root distribution: the prediction before any split (per class)"""
+        return self._node_proba()[self.roots].mean(axis=0)
+
+    def contribution_table(self):
+        """
+        Per-node feature contributions along each root-to-node path (Saabas)
+
+        Entry [node, c, f] is how much the splits on feature f between the
+        tree's root and `node` changed the probability of class c. For a leaf,
+        value[root] plus the sum over features equals value[leaf]. Computed
+        level by level on first use and cached; concurrent first callers
+        wait for one build.
+
+        Returns:
+            ndarray: n_nodes x n_classes x n_features
+        """
+        if self._contributions is None:
+            with self._contributions_lock:
+                if self._contributions is None:
+                    value = self._node_proba()
+                    table = np.zeros((len(value), self.n_classes, self.n_features))
+                    is_leaf = self.is_leaf
+                    nodes = self.roots[~is_leaf[self.roots]]
+                    while len(nodes):
+                        for side in (0, 1):
+                            child = self.children[nodes, side]
+                            table[child] = table[nodes]
+                            table[child, :, self.feature[nodes]] += value[child] - value[nodes]
+                        children = self.children[nodes].ravel()
+                        nodes = children[~is_leaf[children]]
+                    self._contributions = table
+        return self._contributions
+
+    def predict_explained(self, X, top_k=3, chunk_size=256):
+        """
+        Top classes with their probabilities and per-feature contributions
+
+        The leaves found for the probabilities also index the cached
+        contribution table, so explanations cost one extra gather over the
+        top classes only.
+
+        Returns:
+            tuple: (n_rows x top_k class indices, best first,
+                    n_rows x top_k probabilities,
+                    n_rows x top_k x n_features contributions); for each row and
+                    class, bias + contributions.sum(axis=-1) equals the probability
+        """
+        X = np.asarray(X)
+        # (node, class) pairs as rows of a flat table: one take() per chunk
+        table = self.contribution_table().reshape(-1, self.n_features)
+        n_rows = X.shape[0]
+        top = np.empty((n_rows, top_k), dtype=np.intp)
+        scores = np.empty((n_rows, top_k))
+        contributions = np.empty((n_rows, top_k, self.n_features))
+
+        for start in range(0, n_rows, chunk_size):
+            chunk = slice(start, start + chunk_size)
+            leaves = self.apply(X[chunk])
+            proba = np.take(self.value, leaves, axis=0).mean(axis=1, dtype=np.float64) * self.value_scale
+            top[chunk] = np.argsort(proba, axis=1)[:, ::-1][:, :top_k]
+            scores[chunk] = np.take_along_axis(proba, top[chunk], axis=1)
+            # Row leaf * n_classes + class, for every tree and top class: n x trees x top_k x features
+            pairs = leaves[:, :, None] * self.n_classes + top[chunk][:, None, :]
+            contributions[chunk] = np.take(table, pairs, axis=0).mean(axis=1)
+
+        return top, scores, contributions
+
+    def predict_proba_anytime(self, X, confidence=0.99, ranks=3, min_trees=20):
+        """
+        Class probabilities from as few trees as needed to settle the top ranks
+
+        Trees are added in a doubling schedule (min_trees, 2 x min_trees, ...).
+        At each checkpoint a row stops once every adjacent gap among its top
+        `ranks` + 1 classes is wider than the margin for that checkpoint. The
+        margin is the smaller of:
+          - the Hoeffding-Serfling bound on how far the mean per-tree gap
+            (each in [-1, 1]) of the trees seen so far can sit above the full
+            forest's gap, since the trees are a sample drawn without
+            replacement from the forest. It is set for `confidence` over the
+            n_classes - 1 comparisons that fix the top ranks at every
+            checkpoint (Bonferroni);
+          - the gap the remaining trees can close at most (each tree moves it
+            by at most 1).
+        Checkpoints whose margin leaves no room for `ranks` + 1 separated
+        classes are skipped, so when none is left the forest is evaluated in
+        a single pass. Rows that never settle use every tree and match
+        predict_proba exactly.
+
+        Returns:
+            tuple: (n_rows x n_classes probabilities, trees evaluated per row)
+        """
+        X = np.asarray(X)
+        n_rows, n_trees, n_classes = X.shape[0], self.n_trees, self.n_classes
+        ranks = min(ranks, n_classes - 1)
+
+        checkpoints = []
+        t = max(min_trees, 1)
+        while t < n_trees:
+            checkpoints.append(t)
+            t *= 2
+        log_term = np.log((n_classes - 1) * max(len(checkpoints), 1) / (1 - confidence))
+        margins = {}
+        for t in checkpoints:
+            hoeffding = np.sqrt(2 * (1 - (t - 1) / n_trees) * log_term / t)
+            margin = min(hoeffding, (n_trees - t) / t)
+            # The top classes need margins of ranks, ranks - 1, ..., 1 out of a total of 1
+            if margin * ranks * (ranks + 1) / 2 < 1:
+                margins[t] = margin
+
+        total = np.zeros((n_rows, n_classes))
+        trees_used = np.zeros(n_rows, dtype=np.intp)
+        active = np.arange(n_rows)
+        start = 0
+
+        for stop in [*margins, n_trees]:
+            leaves = self.apply(X[active], trees=slice(start, stop))
+            total[active] += np.take(self.value, leaves, axis=0).sum(axis=1, dtype=np.float64)
+            trees_used[active] = stop
+            if stop == n_trees:
+                break
+
+            top = -np.sort(-total[active], axis=1)[:, :ranks + 1] * (self.value_scale / stop)
+            settled = (top[:, :-1] - top[:, 1:] > margins[stop]).all(axis=1)
+            active = active[~settled]
+            start = stop
+            if not len(active):
+                break
+
+        return total / trees_used[:, None] * self.value_scale, trees_used
+
+    def predict_proba(self, X, chunk_size=1024):
+        """Class probabilities averaged over all trees, like RandomForestClassifier.predict_proba"""
+        X = np.asarray(X)
+        proba = np.empty((X.shape[0], self.n_classes))
+
+        for start in range(0, X.shape[0], chunk_size):
+            leaves = self.apply(X[start:start + chunk_size])
+            proba[start:start + chunk_size] = np.take(self.value, leaves, axis=0).mean(axis=1, dtype=np.float64)
+
+        if self.value_scale != 1.0:
+            proba *= self.value_scale
+        return proba
@@ -0,0 +1,262 @@
+import argparse
+import copy
+from pathlib import Path
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from .model import CropRecommendationModel, DEFAULT_DATASET
+from .registry import ModelRegistry
+from .training import measure_latency, serialized_size, write_report
+
+REPORT_FILE = 'compression_report.json'
+
+# Student forest used for distillation
+DISTILL_PARAMS = {
+    'n_estimators': 10,
+    'max_depth': 8,
+    'min_samples_leaf': 2,
+    'random_state': 42
+}
+
+def out_of_bag_mask(forest, n_samples):
+    """
+    Rows each tree of a bootstrapped forest did not see during fitting
+
+    Replays the bootstrap draw of an unweighted fit (the same draw as
+    scikit-learn's oob_score), so `n_samples` must be the number of rows the
+    forest was fitted on, in the same order.
+
+    Returns:
+        ndarray: n_trees x n_samples boolean mask, True where the row is out of bag
+    """
+    if not forest.bootstrap:
+        raise ValueError("Out-of-bag selection needs a forest fitted with bootstrap=True")
+    max_samples = forest.max_samples
+    if max_samples is None:
+        n_bootstrap = n_samples
+    elif isinstance(max_samples, (int, np.integer)):
+        n_bootstrap = max_samples
+    else:
+        n_bootstrap = max(int(max_samples * n_samples), 1)
+
+    mask = np.empty((len(forest.estimators_), n_samples), dtype=bool)
+    for i, tree in enumerate(forest.estimators_):
+        sampled = np.random.RandomState(tree.random_state).randint(0, n_samples, n_bootstrap)
+        mask[i] = np.bincount(sampled, minlength=n_samples) == 0
+    return mask
+
+def select_trees(per_tree_proba, y_val, target_accuracy, min_trees=10, max_trees=None, mask=None):
+    """
+    Greedy forward selection of trees on held-out rows
+
+    Each step adds the tree that gives the sub-forest the highest accuracy
+    on rows its trees did not train on, ties broken by the mean probability of the true class. Stops
+    once the sub-forest reaches target_accuracy with at least min_trees trees.
+
+    Args:
+        per_tree_proba (ndarray): n_trees x n_rows x n_classes probabilities per tree
+        y_val (ndarray): Encoded validation labels
+        target_accuracy (float): Accuracy the sub-forest must reach
+        min_trees (int): Smallest sub-forest to return (keeps the scores smooth)
+        max_trees (int): Largest sub-forest to consider (default all trees)
+        mask (ndarray): n_trees x n_rows, True where a tree may vote on a row
+            (e.g. its out-of-bag rows); a row no selected tree may vote on counts as an error
+
+    Returns:
+        list: Indices of the selected trees, in the order they were added
+    """
+    if mask is not None:
+        per_tree_proba = per_tree_proba * mask[:, :, None]
+    n_trees, n_rows, _ = per_tree_proba.shape
+    max_trees = min(max_trees or n_trees, n_trees)
+    min_trees = min(min_trees, max_trees)
+    rows = np.arange(n_rows)
+
+    selected = []
+    remaining = list(range(n_trees))
+    proba_sum = np.zeros(per_tree_proba.shape[1:])
+
+    while remaining and len(selected) < max_trees:
+        # Candidate sub-forest probabilities for every remaining tree at once
+        candidate_sum = proba_sum[None] + per_tree_proba[remaining]
+        voted = candidate_sum.any(axis=2)
+        accuracy = ((candidate_sum.argmax(axis=2) == y_val[None]) & voted).mean(axis=1)
+        true_class_proba = candidate_sum[:, rows, y_val].mean(axis=1)
+
+        best = int(np.lexsort((true_class_proba, accuracy))[-1])
+        tree = remaining.pop(best)
+        selected.append(tree)
+        proba_sum += per_tree_proba[tree]
+
+        if len(selected) >= min_trees and accuracy[best] >= target_accuracy:
+            break
+
+    return selected
+
+def prune_forest(forest, tree_indices):
+    """Copy of a fitted RandomForestClassifier keeping only the given trees"""
+    pruned = copy.deepcopy(forest)
+    pruned.estimators_ = [pruned.estimators_[i] for i in tree_indices]
+    pruned.n_estimators = len(pruned.estimators_)
+    return pruned
+
+def distill_forest(teacher, X_train, params=None, n_synthetic=5000, noise=0.1, seed=42):
+    """
+    Train a small student forest on the teacher's predictions
+
+    The training rows are augmented with jittered copies (Gaussian noise of
+    `noise` times each feature's standard deviation) so the student also
+    learns the teacher's decision boundaries between the observed samples.
+    """
+    rng = np.random.default_rng(seed)
+    X_train = np.asarray(X_train, dtype=float)
+    picks = rng.integers(0, len(X_train), n_synthetic)
+    jitter = rng.normal(0.0, noise, (n_synthetic, X_train.shape[1])) * X_train.std(axis=0)
+    X_augmented = np.vstack([X_train, X_train[picks] + jitter])
+
+    student = RandomForestClassifier(**{**DISTILL_PARAMS, **(params or {})})
+    student.fit(X_augmented, teacher.predict(X_augmented))
+    return student
+
+def describe(model, X_val, y_val, reference_pred, label):
+    """Accuracy, agreement with the original model, size and latency of a candidate"""
+    forest = model.model
+    predictions = forest.predict(np.asarray(X_val, dtype=float))
+    return {
+        "model": label,
+        "n_trees": len(forest.estimators_),
+        "n_nodes": int(sum(tree.tree_.node_count for tree in forest.estimators_)),
+        "accuracy": float((predictions == y_val).mean()),
+        "agreement": float((predictions == reference_pred).mean()),
+        "model_size_bytes": serialized_size(forest),
+        **measure_latency(model, X_val)
+    }
+
+def compress_model(source, csv_path=None, tolerance=0.005, min_trees=10, distill=False, engine=None):
+    """
+    Compress a trained random forest within an accuracy tolerance
+
+    Args:
+        source (CropRecommendationModel): Loaded random forest model
+        csv_path: Dataset the model was trained on; trees are selected on the out-of-bag
+            rows of the standard training split, and the test rows only score the candidates
+        tolerance (float): Largest accuracy drop allowed versus the original forest
+        min_trees (int): Smallest pruned forest to consider
+        distill (bool): Also try distilling into a small student forest
+
+    Returns:
+        tuple: (CropRecommendationModel serving the chosen model, report dict)
+    """
+    if not isinstance(source.model, RandomForestClassifier):
+        raise ValueError("Compression needs a random forest model (MODEL_TYPE=random_forest)")
+
+    csv_path = csv_path or DEFAULT_DATASET
+    df = source.load_data(csv_path)
+    if df is None:
+        raise RuntimeError(f"Could not load dataset {csv_path}")
+    X = df[source.feature_names]
+    y_encoded = source.label_encoder.transform(df['label'])
+    X_train, X_val, y_train, y_val = source.split_data(X, y_encoded)
+    X_val_array = np.asarray(X_val, dtype=float)
+
+    forest = source.model
+    reference_pred = forest.predict(X_val_array)
+    original = describe(source, X_val, y_val, reference_pred, "original")
+    target_accuracy = original["accuracy"] - tolerance
+
+    def as_model(estimator):
+        model = CropRecommendationModel(engine=engine or source.engine)
+        model.use_estimator(estimator, source.label_encoder, source.training_metrics)
+        return model
+
+    # Every tree only votes on the training rows it never saw, so the selection is
+    # scored out of sample while the test split stays untouched until the tolerance gate
+    X_train_array = np.asarray(X_train, dtype=float)
+    oob = out_of_bag_mask(forest, len(X_train_array))
+    per_tree_proba = np.stack([tree.predict_proba(X_train_array) for tree in forest.estimators_])
+    oob_proba = (per_tree_proba * oob[:, :, None]).sum(axis=0)
+    select_accuracy = float(((oob_proba.argmax(axis=1) == y_train) & oob_proba.any(axis=1)).mean()) - tolerance
+    kept = select_trees(per_tree_proba, y_train, select_accuracy, min_trees=min_trees, mask=oob)
+    pruned_model = as_model(prune_forest(forest, kept))
+    candidates = [(describe(pruned_model, X_val, y_val, reference_pred, "pruned"), pruned_model)]
+    candidates[0][0]["kept_trees"] = sorted(kept)
+
+    if distill:
+        student_model = as_model(distill_forest(forest, X_train))
+        candidates.append((describe(student_model, X_val, y_val, reference_pred, "distilled"), student_model))
+
+    within_tolerance = [c for c in candidates if c[0]["accuracy"] >= target_accuracy]
+    if within_tolerance:
+        chosen, model = min(within_tolerance, key=lambda c: c[0]["latency_p99_ms"])
+        model.training_metrics = {**(source.training_metrics or {}), "accuracy": chosen["accuracy"]}
+    else:
+        print(f"Warning: no compressed model is within {tolerance} accuracy; keeping the original")
+        chosen, model = original, source
+
+    report = {
+        "dataset": str(csv_path),
+        "engine": source.engine,
+        "tolerance": tolerance,
+        "target_accuracy": target_accuracy,
+        "selection_rows": len(y_train),
+        "selection_target_oob_accuracy": select_accuracy,
+        "before": original,
+        "after": chosen,
+        "candidates": [c[0] for c in candidates],
+        "latency_p99_reduction": round(1 - chosen["latency_p99_ms"] / original["latency_p99_ms"], 4),
+        "size_reduction": round(1 - chosen["model_size_bytes"] / original["model_size_bytes"], 4)
+    }
+
+    for stats in (original, *report["candidates"]):
+        print(f"  {stats['model']:>10}: {stats['n_trees']:>4} trees, {stats['n_nodes']:>6} nodes, "
+              f"accuracy {stats['accuracy']:.4f}, agreement {stats['agreement']:.4f}, "
+              f"p99 {stats['latency_p99_ms']:.2f} ms, {stats['model_size_bytes'] / 1024:.0f} KB")
+    print(f"Selected {chosen['model']} model")
+    return model, report
+
+# Compress the bundled model or a registry version from the command line
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prune and distill the random forest within an accuracy tolerance")
+    parser.add_argument("--version", help="Registry version to compress (defaults to the bundled model)")
+    parser.add_argument("--csv", help="Dataset (defaults to data/crop_recommendation.csv)")
+    parser.add_argument("--tolerance", type=float, default=0.005, help="Largest accuracy drop allowed")
+    parser.add_argument("--min-trees", type=int, default=10)
+    parser.add_argument("--distill", action="store_true", help="Also try a distilled student forest")
+    parser.add_argument("--engine", choices=["sklearn", "compiled"],
+                        help="Inference engine to measure latency with (defaults to INFERENCE_ENGINE)")
+    parser.add_argument("--output-dir", help="Save artifacts here instead of publishing to the registry")
+    parser.add_argument("--activate", action="store_true", help="Make the new registry version active")
+    args = parser.parse_args()
+
+    registry = ModelRegistry()
+    source = registry.model_for(args.version, engine=args.engine) if args.version \
+        else CropRecommendationModel(engine=args.engine)
+    source.use_mmap = False
+    if not source.load_model():
+        raise SystemExit(1)
+
+    model, report = compress_model(source, args.csv, args.tolerance, args.min_trees, args.distill, args.engine)
+    if model is source:
+        raise SystemExit("Nothing to publish")
+
+    if args.output_dir:
+        output_dir = Path(args.output_dir)
+        model.model_path = output_dir / model.model_path.name
+        model.encoder_path = output_dir / model.encoder_path.name
+        model.compiled_path = output_dir / model.compiled_path.name
+        model.compact_path = output_dir / model.compact_path.name
+        model.save_model()
+        write_report(report, output_dir, REPORT_FILE)
+    else:
+        after = report["after"]
+        version = registry.publish(model, metrics={
+            "compressed_from": args.version or "bundled",
+            "latency_p50_ms": after["latency_p50_ms"],
+            "latency_p99_ms": after["latency_p99_ms"],
+            "model_size_bytes": after["model_size_bytes"]
+        })
+        write_report({**report, "version": version}, registry.version_dir(version), REPORT_FILE)
+        if args.activate:
+            registry.set_active(version)
+            print(f"Active model version: {version}")
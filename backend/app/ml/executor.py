@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from .inference import InferenceModel
+
+logger = logging.getLogger(__name__)
+
+class InlineInferenceExecutor:
+    """Run inference directly on the calling thread (blocks the event loop)"""
+
+    name = "inline"
+
+    def __init__(self, model_provider):
+        """
+        Args:
+            model_provider (callable): Returns the InferenceModel to use
+        """
+        self.model_provider = model_provider
+        self.workers = 0
+
+    async def start(self):
+        pass
+
+    async def predict_batch(self, features_list, explain=False):
+        """Score a list of feature dicts; returns one top 3 list per row"""
+        return self.model_provider().predict_crops_batch(features_list, explain)
+
+    async def reload(self):
+        """Pick up a newly swapped-in model; in-process backends read it per call"""
+        pass
+
+    async def shutdown(self):
+        pass
+
+class ThreadPoolInferenceExecutor(InlineInferenceExecutor):
+    """Run inference in a thread pool so the event loop keeps serving I/O"""
+
+    name = "thread"
+
+    def __init__(self, model_provider, workers=4):
+        super().__init__(model_provider)
+        self.workers = workers
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="inference")
+
+    async def predict_batch(self, features_list, explain=False):
+        model = self.model_provider()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, model.predict_crops_batch, features_list, explain)
+
+    async def shutdown(self):
+        self._pool.shutdown(wait=True)
+
+# Model loaded once per process pool worker by _init_worker
+_worker_model = None
+
+def _init_worker(model_dir):
+    """Process pool initializer: load the model artifacts once per worker"""
+    global _worker_model
+    _worker_model = InferenceModel(model_dir=model_dir)
+    if not _worker_model.load_model():
+        logger.error(f"Inference worker {os.getpid()} could not load a model from {model_dir}")
+
+def _predict_in_worker(features_list, explain=False):
+    return _worker_model.predict_crops_batch(features_list, explain)
+
+def _ping_worker():
+    return os.getpid()
+
+class ProcessPoolInferenceExecutor(InlineInferenceExecutor):
+    """Run inference in worker processes, sidestepping the GIL for CPU-bound scoring"""
+
+    name = "process"
+
+    def __init__(self, model_provider, workers=2, start_method="spawn"):
+        super().__init__(model_provider)
+        self.workers = workers
+        self.start_method = start_method
+        self._pool = self._create_pool()
+
+    def _create_pool(self):
+        model = self.model_provider()
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context(self.start_method),
+            initializer=_init_worker,
+            initargs=(str(model.model_path.parent),)
+        )
+
+    async def _spawn_workers(self, pool):
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[
+            loop.run_in_executor(pool, _ping_worker) for _ in range(self.workers)
+        ])
+
+    async def start(self):
+        """Spawn every worker up front so the first requests don't pay for model loading"""
+        await self._spawn_workers(self._pool)
+        logger.info(f"Inference process pool started with {self.workers} workers")
+
+    async def predict_batch(self, features_list, explain=False):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, _predict_in_worker, features_list, explain)
+
+    async def reload(self):
+        """Start a pool on the new model's artifacts, then retire the old one"""
+        new_pool = self._create_pool()
+        await self._spawn_workers(new_pool)
+
+        old_pool, self._pool = self._pool, new_pool
+        # Requests already queued on the old pool finish on the old model
+        await asyncio.to_thread(old_pool.shutdown, wait=True)
+        logger.info("Inference process pool reloaded")
+
+    async def shutdown(self):
+        self._pool.shutdown(wait=True)
+
+def create_inference_executor(backend, model_provider, workers=None, start_method="spawn"):
+    """
+    Build an inference executor
+
+    Args:
+        backend (str): "thread", "process" or "inline"
+        model_provider (callable): Returns the InferenceModel to use
+        workers (int): Pool size; defaults to the number of CPUs (max 4 for threads)
+        start_method (str): multiprocessing start method for the process backend
+    """
+    cpus = os.cpu_count() or 1
+
+    if backend == "thread":
+        return ThreadPoolInferenceExecutor(model_provider, workers=workers or min(4, cpus))
+    if backend == "process":
+        return ProcessPoolInferenceExecutor(model_provider, workers=workers or cpus, start_method=start_method)
+    if backend == "inline":
+        return InlineInferenceExecutor(model_provider)
+
+    raise ValueError(f"Unknown inference executor backend: {backend}")
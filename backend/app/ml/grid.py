@@ -0,0 +1,237 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from .model import CropRecommendationModel, DEFAULT_DATASET
+
+# Bounds enforced by CropPredictionRequest, in feature order
+FEATURE_BOUNDS = {
+    'N': (0, 300),
+    'P': (0, 150),
+    'K': (0, 100),
+    'temperature': (-10, 50),
+    'humidity': (0, 100),
+    'ph': (3, 10),
+    'rainfall': (0, 500)
+}
+
+DEFAULT_LEVELS = 8
+
+GRID_DIR = 'prediction_grid'
+METADATA_FILE = 'grid.json'
+INDICES_FILE = 'top_indices.npy'
+SCORES_FILE = 'top_scores.npy'
+
+def parse_levels(spec, default=DEFAULT_LEVELS):
+    """Parse "ph=16,N=12" into a levels-per-feature dict on top of `default`"""
+    levels = {name: default for name in FEATURE_BOUNDS}
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        name, _, count = item.partition("=")
+        if name.strip() not in levels:
+            raise ValueError(f"Unknown feature in grid levels: {name}")
+        levels[name.strip()] = int(count)
+    return levels
+
+def model_signature(model):
+    """Size and mtime of the model artifacts, to detect a grid built for another model"""
+    signature = []
+    for path in (model.model_path, model.compiled_path):
+        try:
+            stat = os.stat(path)
+            signature.append([stat.st_size, stat.st_mtime_ns])
+        except OSError:
+            signature.append(None)
+    return signature
+
+class PredictionGrid:
+    """
+    Top 3 predictions precomputed over a quantized grid of the feature space.
+
+    Each feature range is split into equal-width cells and the model is
+    evaluated once at every cell centre. Lookups quantize the input and read
+    the cell's top 3 class indices (uint8) and scores (float16) from
+    memory-mapped arrays, so a prediction is a direct index computation.
+    """
+
+    def __init__(self, levels, indices, scores, classes):
+        """
+        Args:
+            levels (dict): Cells per feature, in FEATURE_BOUNDS order
+            indices (ndarray): n_cells x 3 uint8 class indices, best first
+            scores (ndarray): n_cells x 3 float16 probabilities
+            classes (ndarray): Class names the indices refer to
+        """
+        self.levels = np.array([levels[name] for name in FEATURE_BOUNDS], dtype=np.int64)
+        self.low = np.array([bounds[0] for bounds in FEATURE_BOUNDS.values()], dtype=float)
+        self.high = np.array([bounds[1] for bounds in FEATURE_BOUNDS.values()], dtype=float)
+        self.step = (self.high - self.low) / self.levels
+        # Row-major strides: flat cell = sum(cell_index * stride)
+        self.strides = np.concatenate([np.cumprod(self.levels[::-1])[::-1][1:], [1]])
+        self.indices = indices
+        self.scores = scores
+        self.classes = np.asarray(classes)
+
+    @property
+    def n_cells(self):
+        return int(np.prod(self.levels))
+
+    def cells(self, feature_array):
+        """Flat cell index of every row of an N x 7 feature array"""
+        cell = np.floor((np.asarray(feature_array, dtype=float) - self.low) / self.step).astype(np.int64)
+        np.clip(cell, 0, self.levels - 1, out=cell)
+        return cell @ self.strides
+
+    def centers(self, flat_cells):
+        """Feature values at the centre of the given flat cells"""
+        cell = np.stack(np.unravel_index(flat_cells, tuple(self.levels)), axis=1)
+        return self.low + (cell + 0.5) * self.step
+
+    def lookup(self, feature_array):
+        """Top 3 class indices and scores for every row, like argsort over predict_proba"""
+        flat_cells = self.cells(feature_array)
+        return self.indices[flat_cells], self.scores[flat_cells].astype(float)
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        directory = Path(directory)
+        with open(directory / METADATA_FILE) as f:
+            metadata = json.load(f)
+        grid = cls(
+            metadata["levels"],
+            np.load(directory / INDICES_FILE, mmap_mode=mmap_mode),
+            np.load(directory / SCORES_FILE, mmap_mode=mmap_mode),
+            metadata["classes"]
+        )
+        grid.metadata = metadata
+        return grid
+
+# Model of a grid build worker, set once by the pool initializer
+_grid_model = None
+_grid_output = None
+
+def _init_grid_worker(model_dir, directory, levels):
+    global _grid_model, _grid_output
+    _grid_model = CropRecommendationModel(model_dir=model_dir)
+    _grid_model.use_mmap = False
+    _grid_model.load_model()
+    _grid_output = (
+        PredictionGrid(levels, None, None, _grid_model.classes),
+        open_memmap(Path(directory) / INDICES_FILE, mode='r+'),
+        open_memmap(Path(directory) / SCORES_FILE, mode='r+')
+    )
+
+def _fill_chunk(bounds):
+    """Evaluate the model at the centres of cells [start, end) and write their top 3"""
+    start, end = bounds
+    grid, indices, scores = _grid_output
+    probabilities = _grid_model.predict_proba(grid.centers(np.arange(start, end)))
+    top = np.argsort(probabilities, axis=1)[:, ::-1][:, :3]
+    indices[start:end] = top
+    scores[start:end] = np.take_along_axis(probabilities, top, axis=1)
+    return end - start
+
+def build_grid(model, levels=None, directory=None, workers=None, chunk_size=65536):
+    """
+    Build the grid for a saved model, in parallel chunks written straight to disk
+
+    Args:
+        model (CropRecommendationModel): Loaded model whose artifacts are on disk
+        levels (dict): Cells per feature (default DEFAULT_LEVELS each)
+        directory: Output directory (default <model dir>/prediction_grid)
+        workers (int): Build processes (default all cores)
+        chunk_size (int): Cells evaluated per task
+
+    Returns:
+        Path: The grid directory
+    """
+    levels = levels or parse_levels(None)
+    directory = Path(directory or model.model_path.parent / GRID_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    if len(model.classes) > 255:
+        raise ValueError("uint8 grid indices support at most 255 classes")
+
+    n_cells = int(np.prod([levels[name] for name in FEATURE_BOUNDS]))
+    # Preallocate the files; workers fill their chunks through their own memmaps
+    open_memmap(directory / INDICES_FILE, mode='w+', dtype=np.uint8, shape=(n_cells, 3)).flush()
+    open_memmap(directory / SCORES_FILE, mode='w+', dtype=np.float16, shape=(n_cells, 3)).flush()
+
+    workers = workers or os.cpu_count() or 1
+    chunks = [(start, min(start + chunk_size, n_cells)) for start in range(0, n_cells, chunk_size)]
+    print(f"Building {n_cells:,} grid cells in {len(chunks)} chunks on {workers} worker(s)...")
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_grid_worker,
+                             initargs=(str(model.model_path.parent), str(directory), levels)) as pool:
+        for _ in pool.map(_fill_chunk, chunks):
+            pass
+    build_seconds = time.perf_counter() - started
+
+    metadata = {
+        "levels": levels,
+        "bounds": FEATURE_BOUNDS,
+        "classes": [str(c) for c in model.classes],
+        "model_signature": model_signature(model),
+        "n_cells": n_cells,
+        "size_bytes": n_cells * 3 * (1 + 2),
+        "build_seconds": round(build_seconds, 3)
+    }
+    with open(directory / METADATA_FILE, 'w') as f:
+        json.dump(metadata, f, indent=2)
+    print(f"Grid saved to {directory} ({metadata['size_bytes'] / 1024 / 1024:.1f} MB, {build_seconds:.1f} s)")
+    return directory
+
+def agreement_report(model, grid, X):
+    """How often grid lookups agree with the full model on the rows of X"""
+    probabilities = model.predict_proba(X)
+    model_top = np.argsort(probabilities, axis=1)[:, ::-1][:, :3]
+    grid_top, grid_scores = grid.lookup(X)
+
+    return {
+        "rows": len(X),
+        "top1_agreement": round(float((grid_top[:, 0] == model_top[:, 0]).mean()), 4),
+        "top3_set_agreement": round(float(np.mean([
+            set(a) == set(b) for a, b in zip(grid_top, model_top)
+        ])), 4),
+        "mean_abs_top1_score_error": round(float(np.abs(
+            grid_scores[:, 0] - probabilities[np.arange(len(X)), grid_top[:, 0]]
+        ).mean()), 4)
+    }
+
+# Build a grid for the bundled model or a registry version from the command line
+if __name__ == "__main__":
+    from .registry import ModelRegistry
+
+    parser = argparse.ArgumentParser(description="Precompute top 3 predictions over a quantized feature grid")
+    parser.add_argument("--version", help="Registry version (defaults to the bundled model)")
+    parser.add_argument("--levels", type=int, default=DEFAULT_LEVELS, help="Cells per feature")
+    parser.add_argument("--feature-levels", help='Per-feature overrides, e.g. "ph=16,rainfall=12"')
+    parser.add_argument("--workers", type=int, help="Build processes (defaults to all cores)")
+    parser.add_argument("--chunk-size", type=int, default=65536)
+    parser.add_argument("--samples", type=int, default=100000, help="Random rows for the agreement report")
+    args = parser.parse_args()
+
+    model = ModelRegistry().model_for(args.version) if args.version else CropRecommendationModel()
+    model.use_mmap = False
+    if not model.load_model():
+        raise SystemExit(1)
+
+    directory = build_grid(model, parse_levels(args.feature_levels, args.levels),
+                           workers=args.workers, chunk_size=args.chunk_size)
+    grid = PredictionGrid.load(directory)
+
+    rng = np.random.default_rng(0)
+    df = model.load_data(DEFAULT_DATASET)
+    report = {
+        "uniform_random": agreement_report(model, grid, rng.uniform(grid.low, grid.high, (args.samples, len(grid.low)))),
+        "dataset": agreement_report(model, grid, df[model.feature_names].to_numpy(dtype=float)) if df is not None else None
+    }
+    grid.metadata["agreement"] = report
+    with open(directory / METADATA_FILE, 'w') as f:
+        json.dump(grid.metadata, f, indent=2)
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,285 @@
+import argparse
+import asyncio
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from bson import ObjectId
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import train_test_split
+
+from .model import CropRecommendationModel, DEFAULT_DATASET
+from .registry import ModelRegistry
+
+CHECKPOINT_FILE = 'incremental_checkpoint.json'
+
+class IncrementalTrainer:
+    """
+    Grows the served random forest from accepted feedback without retraining it.
+
+    Feedback is read with a cursor in batches of `batch_size`, oldest first,
+    starting after the checkpoint of the previous run. Each accepted feedback
+    row is joined with the recommendation it refers to; its `input_data`
+    becomes a training sample labelled with the accepted crop. Every batch adds
+    `trees_per_batch` trees with warm_start, fitted on the batch plus a small
+    stratified replay sample of the original training split (so the new trees
+    still see every crop). A batch whose trees lower validation accuracy is
+    rolled back. Memory stays flat: only one batch of feedback is held at a time.
+    """
+
+    def __init__(self, registry=None, batch_size=500, trees_per_batch=10, max_trees=300,
+                 replay_rows=500, feedback_weight=1.0, tolerance=0.0, csv_path=None):
+        """
+        Args:
+            registry (ModelRegistry): Where the base model comes from and new versions go
+            batch_size (int): Feedback documents per cursor batch
+            trees_per_batch (int): Trees added for every batch with accepted feedback
+            max_trees (int): Stop growing the forest at this size
+            replay_rows (int): Original training rows mixed into every batch
+            feedback_weight (float): Sample weight of feedback rows relative to replay rows
+            tolerance (float): Accuracy drop allowed before a batch is rolled back
+            csv_path: Dataset providing the replay rows and the validation split
+        """
+        self.registry = registry or ModelRegistry()
+        self.batch_size = batch_size
+        self.trees_per_batch = trees_per_batch
+        self.max_trees = max_trees
+        self.replay_rows = replay_rows
+        self.feedback_weight = feedback_weight
+        self.tolerance = tolerance
+        self.csv_path = csv_path or DEFAULT_DATASET
+        self.checkpoint_path = self.registry.root / CHECKPOINT_FILE
+
+    def load_checkpoint(self):
+        """Last processed feedback (created_at, _id), or None on the first run"""
+        if not self.checkpoint_path.exists():
+            return None
+        with open(self.checkpoint_path) as f:
+            checkpoint = json.load(f)
+        return datetime.fromisoformat(checkpoint["created_at"]), ObjectId(checkpoint["feedback_id"])
+
+    def save_checkpoint(self, created_at, feedback_id, version=None):
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.checkpoint_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                "created_at": created_at.isoformat(),
+                "feedback_id": str(feedback_id),
+                "version": version,
+                "updated_at": datetime.utcnow().isoformat()
+            }, f, indent=2)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    async def feedback_batches(self, database, checkpoint=None):
+        """Yield lists of feedback documents newer than the checkpoint, oldest first"""
+        query = {}
+        if checkpoint:
+            created_at, feedback_id = checkpoint
+            query = {"$or": [
+                {"created_at": {"$gt": created_at}},
+                {"created_at": created_at, "_id": {"$gt": feedback_id}}
+            ]}
+
+        cursor = database["feedback"].find(
+            query, {"farm_id": 1, "recommendation_id": 1, "crop": 1, "accepted": 1, "created_at": 1}
+        ).sort([("created_at", 1), ("_id", 1)]).batch_size(self.batch_size)
+
+        batch = []
+        async for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    async def _input_data(self, database, feedback):
+        """input_data of the recommendation a feedback document refers to"""
+        recommendations = database["recommendations"]
+        recommendation_id = feedback.get("recommendation_id")
+        if recommendation_id and ObjectId.is_valid(recommendation_id):
+            recommendation = await recommendations.find_one(
+                {"_id": ObjectId(recommendation_id)}, {"input_data": 1}
+            )
+        else:
+            # Feedback without an id refers to the farm's latest recommendation at that time
+            recommendation = await recommendations.find_one(
+                {"farm_id": feedback["farm_id"], "created_at": {"$lte": feedback["created_at"]}},
+                {"input_data": 1},
+                sort=[("created_at", -1)]
+            )
+        return (recommendation or {}).get("input_data")
+
+    async def samples(self, database, batch, model):
+        """Feature rows and encoded labels for the accepted feedback in a batch"""
+        rows, labels = [], []
+        known_crops = set(model.label_encoder.classes_)
+        for feedback in batch:
+            if not feedback.get("accepted") or feedback.get("crop") not in known_crops:
+                continue
+            input_data = await self._input_data(database, feedback)
+            if input_data:
+                rows.append([input_data[name] for name in model.feature_names])
+                labels.append(feedback["crop"])
+
+        X = pd.DataFrame(rows, columns=model.feature_names, dtype=float)
+        y = model.label_encoder.transform(labels) if labels else np.empty(0, dtype=int)
+        return X, y
+
+    def _base_model(self):
+        """Fresh copy of the active registry version (or the bundled model) with its sklearn forest"""
+        model = self.registry.active_model(engine="sklearn") or CropRecommendationModel(engine="sklearn")
+        model.use_mmap = False
+        if not model.load_model():
+            raise RuntimeError("No trained model to update")
+        if not isinstance(model.model, RandomForestClassifier):
+            raise ValueError("Incremental updates need a random forest model")
+        return model
+
+    def _prepare(self):
+        """Base model, standard split and baseline validation accuracy"""
+        model = self._base_model()
+        df = model.load_data(self.csv_path)
+        if df is None:
+            raise RuntimeError(f"Could not load dataset {self.csv_path}")
+        X_all = df[model.feature_names]
+        y_all = model.label_encoder.transform(df['label'])
+        X_train, X_val, y_train, y_val = model.split_data(X_all, y_all)
+        baseline = accuracy_score(y_val, model.model.predict(X_val))
+        return model, (X_train, X_val, y_train, y_val), baseline
+
+    def _update(self, forest, split, X_feedback, y_feedback, seed, baseline):
+        """
+        Add trees for one batch and roll them back if they cost accuracy
+
+        Returns:
+            float: Validation accuracy with the new trees, or None if they were rolled back
+        """
+        X_train, X_val, y_train, y_val = split
+        replay_size = min(self.replay_rows, len(y_train) - len(np.unique(y_train)))
+        X_replay, _, y_replay, _ = train_test_split(
+            X_train, y_train, train_size=replay_size, stratify=y_train, random_state=seed
+        )
+
+        n_trees = len(forest.estimators_)
+        self._add_trees(forest, X_feedback, y_feedback, X_replay, y_replay)
+        accuracy = accuracy_score(y_val, forest.predict(X_val))
+        if accuracy < baseline - self.tolerance:
+            # These trees made the forest worse: drop them again
+            forest.estimators_ = forest.estimators_[:n_trees]
+            forest.n_estimators = n_trees
+            return None
+        return accuracy
+
+    def _add_trees(self, forest, X_feedback, y_feedback, X_replay, y_replay):
+        X = pd.concat([X_replay, X_feedback], ignore_index=True)
+        y = np.concatenate([y_replay, y_feedback])
+        weights = np.concatenate([
+            np.ones(len(y_replay)), np.full(len(y_feedback), self.feedback_weight)
+        ])
+
+        forest.warm_start = True
+        forest.n_estimators += self.trees_per_batch
+        try:
+            forest.fit(X, y, sample_weight=weights)
+        finally:
+            forest.warm_start = False
+
+    async def run(self, database, activate=False):
+        """
+        Process all new feedback and publish a version if it helped
+
+        Loading, fitting and scoring run in worker threads; only the Mongo
+        reads run on the event loop.
+
+        Returns:
+            dict: Report of batches, samples, accuracy before/after and the new version
+        """
+        model, split, baseline = await asyncio.to_thread(self._prepare)
+        forest = model.model
+        accuracy = baseline
+        report = {
+            "base_version": model.version,
+            "base_trees": forest.n_estimators,
+            "baseline_accuracy": float(baseline),
+            "batches": 0,
+            "feedback_rows": 0,
+            "samples": 0,
+            "batches_kept": 0,
+            "batches_rolled_back": 0,
+            "tree_cap_reached": False
+        }
+
+        checkpoint = self.load_checkpoint()
+        last_seen = None
+        async for batch in self.feedback_batches(database, checkpoint):
+            if forest.n_estimators + self.trees_per_batch > self.max_trees:
+                report["tree_cap_reached"] = True
+                break
+
+            report["batches"] += 1
+            report["feedback_rows"] += len(batch)
+            last_seen = (batch[-1]["created_at"], batch[-1]["_id"])
+
+            X_feedback, y_feedback = await self.samples(database, batch, model)
+            if not len(y_feedback):
+                continue
+
+            batch_accuracy = await asyncio.to_thread(
+                self._update, forest, split, X_feedback, y_feedback, report["batches"], baseline
+            )
+            if batch_accuracy is None:
+                report["batches_rolled_back"] += 1
+            else:
+                accuracy = batch_accuracy
+                report["samples"] += len(y_feedback)
+                report["batches_kept"] += 1
+
+        report["trees"] = forest.n_estimators
+        report["accuracy"] = float(accuracy)
+        report["version"] = None
+
+        if report["batches_kept"]:
+            model.use_estimator(forest, model.label_encoder, {
+                **(model.training_metrics or {}),
+                "accuracy": float(accuracy)
+            })
+            report["version"] = await asyncio.to_thread(
+                self.registry.publish, model, {"incremental_update": report}
+            )
+            if activate:
+                await asyncio.to_thread(self.registry.set_active, report["version"])
+
+        if last_seen:
+            self.save_checkpoint(*last_seen, version=report["version"])
+        return report
+
+# Run the job from the command line (e.g. from cron)
+if __name__ == "__main__":
+    from ..db import connect_to_mongo, close_mongo_connection, get_database
+
+    parser = argparse.ArgumentParser(description="Update the model from accumulated feedback")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--trees-per-batch", type=int, default=10)
+    parser.add_argument("--max-trees", type=int, default=300)
+    parser.add_argument("--replay-rows", type=int, default=500)
+    parser.add_argument("--feedback-weight", type=float, default=1.0)
+    parser.add_argument("--activate", action="store_true", help="Make the new version active")
+    args = parser.parse_args()
+
+    async def main():
+        await connect_to_mongo()
+        try:
+            trainer = IncrementalTrainer(
+                batch_size=args.batch_size, trees_per_batch=args.trees_per_batch,
+                max_trees=args.max_trees, replay_rows=args.replay_rows,
+                feedback_weight=args.feedback_weight
+            )
+            print(json.dumps(await trainer.run(get_database(), activate=args.activate), indent=2, default=str))
+        finally:
+            await close_mongo_connection()
+
+    asyncio.run(main())
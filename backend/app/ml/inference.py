@@ -0,0 +1,347 @@
+import os
+import threading
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+from .compiled_forest import CompiledForest
+from ..metrics import metrics
+
+# Threshold bands used to explain a recommendation, per feature:
+# (low bound, high bound, (phrase below low, phrase in between, phrase above high))
+REASON_BANDS = {
+    'N': (40, 80, ("low nitrogen requirement", "moderate nitrogen levels", "high nitrogen content")),
+    'P': (20, 50, ("low phosphorus requirement", "adequate phosphorus levels", "high phosphorus availability")),
+    'K': (20, 40, ("low potassium requirement", "suitable potassium levels", "high potassium content")),
+    'temperature': (20, 30, ("cool climate suitability", "moderate temperature range", "warm climate preference")),
+    'humidity': (40, 70, ("low humidity adaptation", "moderate humidity conditions", "high humidity tolerance")),
+    'ph': (6.0, 7.5, ("acidic soil tolerance", "neutral pH suitability", "alkaline soil preference")),
+    'rainfall': (100, 200, ("drought tolerance", "moderate water needs", "high rainfall requirement"))
+}
+
+# Directory holding the default model artifacts
+DEFAULT_MODEL_DIR = Path(__file__).parent
+
+class InferenceModel:
+    """
+    Serving side of the crop model: loads an artifact and predicts.
+
+    Module imports are limited to NumPy and joblib, so a worker serving
+    compiled_model.joblib or compact_model.joblib never imports pandas or
+    scikit-learn. Loading trained_model.joblib still imports the parts of
+    scikit-learn its pickle refers to. Training lives in
+    CropRecommendationModel (model.py).
+    """
+
+    def __init__(self, engine=None, model_dir=None):
+        self.model = None
+        self.label_encoder = None
+        # "sklearn" calls predict_proba, "compiled" uses the array-based CompiledForest
+        self.engine = engine or os.getenv("INFERENCE_ENGINE", "sklearn").lower()
+        self.compiled_forest = None
+        # Compiled forest for per-row tree path work (explain=True, early exit), built on first use
+        self._path_forest = None
+        self._path_lock = threading.Lock()
+        # Whether the loaded sklearn model is a random forest that can be compiled
+        self._compilable = False
+        # Anytime inference: stop adding trees once the top ranks are statistically settled
+        self.early_exit = os.getenv("INFERENCE_EARLY_EXIT", "false").lower() == "true"
+        self.early_exit_confidence = float(os.getenv("EARLY_EXIT_CONFIDENCE", "0.99"))
+        self.early_exit_ranks = int(os.getenv("EARLY_EXIT_RANKS", "3"))
+        self.early_exit_min_trees = int(os.getenv("EARLY_EXIT_MIN_TREES", "20"))
+        # Batches below this size skip early exit; by default single rows use it too
+        self.early_exit_min_rows = int(os.getenv("EARLY_EXIT_MIN_ROWS", "1"))
+        # sklearn's C traversal wins again on very large batches
+        self.compiled_max_rows = int(os.getenv("COMPILED_ENGINE_MAX_ROWS", "512"))
+        # Built once per model by _build_reason_table
+        self.reason_features = None
+        self.reason_table = None
+        self.feature_names = ['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall']
+        model_dir = Path(model_dir or os.getenv("MODEL_DIR") or DEFAULT_MODEL_DIR)
+        self.model_path = model_dir / 'trained_model.joblib'
+        self.encoder_path = model_dir / 'label_encoder.joblib'
+        # Uncompressed CompiledForest arrays that every worker can memory-map
+        self.compiled_path = model_dir / 'compiled_model.joblib'
+        self.use_mmap = os.getenv("MODEL_MMAP", "false").lower() == "true"
+        # Reduced-precision CompiledForest written by `python -m app.ml.compact`
+        self.compact_path = model_dir / 'compact_model.joblib'
+        self.use_compact = os.getenv("MODEL_COMPACT", "false").lower() == "true"
+        # Answer predictions from the precomputed grid (see grid.py) when one matches this model
+        self.use_grid = os.getenv("PREDICTION_GRID", "false").lower() == "true"
+        self.grid = None
+        # Set from whichever artifact was loaded
+        self.classes = None
+        self.feature_importances = None
+        # Registry version this model was loaded from, if any
+        self.version = None
+        # Accuracy and timing of the last train_model run
+        self.training_metrics = None
+
+    def load_model(self):
+        """Load the trained model and label encoder"""
+        if self.use_compact and self.compact_path.exists():
+            return self.load_compiled_model(path=self.compact_path)
+        if self.use_mmap and self.compiled_path.exists():
+            return self.load_compiled_model()
+        
+        try:
+            if self.model_path.exists() and self.encoder_path.exists():
+                self.model = joblib.load(self.model_path)
+                self.label_encoder = joblib.load(self.encoder_path)
+                self._prepare_inference()
+                self._load_grid()
+                print("Model and encoder loaded successfully")
+                return True
+            else:
+                print("Model files not found. Please train the model first.")
+                return False
+        except Exception as e:
+            print(f"Error loading model: {e}")
+            return False
+    
+    def use_estimator(self, estimator, label_encoder, training_metrics=None):
+        """Serve an estimator that was fitted elsewhere (e.g. by the training pipeline)"""
+        self.model = estimator
+        self.label_encoder = label_encoder
+        self.training_metrics = training_metrics
+        self._prepare_inference()
+    
+    def load_compiled_model(self, mmap_mode='r', path=None):
+        """
+        Load the compiled forest artifact with its arrays memory-mapped
+        
+        The arrays stay in the OS page cache and are shared by every worker
+        process that maps the same file. The sklearn model is not loaded, so
+        all batch sizes are served by the compiled engine. `path` selects
+        another artifact of the same layout, e.g. the compact export.
+        """
+        path = path or self.compiled_path
+        try:
+            artifact = joblib.load(path, mmap_mode=mmap_mode)
+            self.model = None
+            self.label_encoder = None
+            self.compiled_forest = CompiledForest.from_arrays(artifact["forest"])
+            self._path_forest = None
+            self._compilable = False
+            self.classes = np.asarray(artifact["classes"])
+            self.feature_importances = np.asarray(artifact["feature_importances"])
+            self._build_reason_table()
+            self.grid = None
+            self._load_grid()
+            print(f"Compiled model loaded from {path} (mmap_mode={mmap_mode})")
+            return True
+        except Exception as e:
+            print(f"Error loading compiled model: {e}")
+            return False
+    
+    def is_loaded(self):
+        """Whether a model is ready to serve predictions"""
+        return self.classes is not None and (
+            self.model is not None or self.compiled_forest is not None
+        )
+    
+    def _prepare_inference(self):
+        """Precompute everything the prediction path needs from a freshly loaded model"""
+        self.classes = self.label_encoder.classes_
+        self.feature_importances = self.model.feature_importances_
+        self._build_reason_table()
+        
+        # A grid built for the previous model no longer applies
+        self.grid = None
+        
+        # Array-based inference engine, when it is the configured engine
+        # (only random forests can be compiled; other models use their own predict_proba)
+        self.compiled_forest = None
+        self._path_forest = None
+        # Unpickling the model has already imported scikit-learn, so this import is free
+        from sklearn.ensemble import RandomForestClassifier
+        self._compilable = isinstance(self.model, RandomForestClassifier)
+        if self._compilable and self.engine == "compiled":
+            self.compiled_forest = CompiledForest.from_sklearn(self.model)
+    
+    @property
+    def path_forest(self):
+        """
+        Compiled forest for explain=True and early exit, or None for models that cannot be compiled
+        
+        Nothing is built until the first request that needs it: the sklearn
+        engine compiles the forest then, and the contribution table is built
+        on the first explain=True call. Workers that never explain or exit
+        early keep only the model they loaded.
+        """
+        if self.compiled_forest is not None:
+            return self.compiled_forest
+        if self._path_forest is None and self._compilable:
+            with self._path_lock:
+                if self._path_forest is None:
+                    self._path_forest = CompiledForest.from_sklearn(self.model)
+        return self._path_forest
+    
+    def _load_grid(self):
+        """Memory-map the prediction grid next to the artifacts if enabled and built for this model"""
+        if not self.use_grid:
+            return
+        from .grid import GRID_DIR, PredictionGrid, model_signature
+        
+        directory = self.model_path.parent / GRID_DIR
+        try:
+            grid = PredictionGrid.load(directory)
+        except OSError:
+            print(f"PREDICTION_GRID is set but no grid was found in {directory}")
+            return
+        if grid.metadata["model_signature"] != model_signature(self) or \
+                list(grid.classes) != [str(c) for c in self.classes]:
+            print(f"Prediction grid in {directory} was built for another model; ignoring it")
+            return
+        self.grid = grid
+        print(f"Prediction grid loaded from {directory} ({grid.n_cells:,} cells)")
+    
+    def _build_reason_table(self):
+        """
+        Precompute every possible reason string
+        
+        Reasons use the two globally most important features, so each reason is
+        fully determined by which band those two feature values fall into.
+        """
+        importances = dict(zip(self.feature_names, self.feature_importances))
+        top_features = [
+            feature for feature, _ in
+            sorted(importances.items(), key=lambda x: x[1], reverse=True)[:2]
+        ]
+        
+        phrases = [REASON_BANDS[feature][2] for feature in top_features]
+        self.reason_features = top_features
+        self.reason_table = np.array([
+            [f"Suitable due to {first} and {second}" for second in phrases[1]]
+            for first in phrases[0]
+        ], dtype=object)
+    
+    def predict_proba(self, feature_array):
+        """Class probabilities for an N x 7 feature array using the configured engine"""
+        if self.compiled_forest is not None and (
+            self.model is None or len(feature_array) <= self.compiled_max_rows
+        ):
+            return self.compiled_forest.predict_proba(feature_array)
+        return self.model.predict_proba(feature_array)
+    
+    def to_feature_array(self, features_list):
+        """Stack a list of feature dicts into an N x 7 array in feature_names order"""
+        return np.array(
+            [[features[name] for name in self.feature_names] for features in features_list],
+            dtype=float
+        ).reshape(-1, len(self.feature_names))
+    
+    def predict_crop(self, features, explain=False):
+        """
+        Predict crop recommendation for given features
+        
+        Args:
+            features (dict): Dictionary with keys: N, P, K, temperature, humidity, ph, rainfall
+            explain (bool): Add per-feature contributions to each recommendation
+        
+        Returns:
+            list: Top 3 crop recommendations with scores and reasons
+        """
+        results = self.predict_crops_batch([features], explain=explain)
+        if not results:
+            return None
+        return results[0]
+    
+    def predict_crops_batch(self, features_list, explain=False):
+        """
+        Predict crop recommendations for a batch of feature sets in one pass
+        
+        Args:
+            features_list (list): List of feature dictionaries, each with keys
+                N, P, K, temperature, humidity, ph, rainfall
+            explain (bool): Add a "contributions" dict (feature -> change in the
+                crop's score along the tree paths) to each recommendation.
+                Random forests only; other models return no contributions.
+        
+        Returns:
+            list: One top 3 recommendation list per input row, in input order
+        """
+        if not self.is_loaded():
+            if not self.load_model():
+                return None
+        
+        if not features_list:
+            return []
+        
+        try:
+            # Single predict_proba call over the whole N x 7 matrix
+            feature_array = self.to_feature_array(features_list)
+            contributions = None
+            if explain and self.path_forest is not None:
+                # Exact probabilities and contributions from the same tree traversal
+                with metrics.timer("model_stage_duration_seconds", stage="predict_explain"):
+                    top_indices, top_scores, contributions = self.path_forest.predict_explained(feature_array)
+            elif self.grid is not None:
+                # Approximate top 3 read straight from the precomputed grid
+                with metrics.timer("model_stage_duration_seconds", stage="grid_lookup"):
+                    top_indices, top_scores = self.grid.lookup(feature_array)
+            else:
+                if self.early_exit and len(feature_array) >= self.early_exit_min_rows \
+                        and self.path_forest is not None:
+                    with metrics.timer("model_stage_duration_seconds", stage="predict_early_exit"):
+                        probabilities, trees_evaluated = self.path_forest.predict_proba_anytime(
+                            feature_array, confidence=self.early_exit_confidence,
+                            ranks=self.early_exit_ranks, min_trees=self.early_exit_min_trees
+                        )
+                    for trees in trees_evaluated.tolist():
+                        metrics.observe("early_exit_trees_evaluated", trees)
+                else:
+                    with metrics.timer("model_stage_duration_seconds", stage="predict_proba"):
+                        probabilities = self.predict_proba(feature_array)
+                
+                # Top 3 per row, highest score first
+                top_indices = np.argsort(probabilities, axis=1)[:, ::-1][:, :3]
+                top_scores = np.take_along_axis(probabilities, top_indices, axis=1)
+            top_crops = self.classes[top_indices]
+            
+            # The reason only depends on the input values, not on the crop
+            with metrics.timer("model_stage_duration_seconds", stage="reasons"):
+                reasons = self._generate_reasons(feature_array)
+            
+            results = []
+            for row, reason in enumerate(reasons):
+                results.append([
+                    {
+                        "crop": str(top_crops[row, rank]),
+                        "score": float(top_scores[row, rank]),
+                        "reason": reason
+                    }
+                    for rank in range(top_indices.shape[1])
+                ])
+            
+            if contributions is not None:
+                for row_results, row_contributions in zip(results, contributions.tolist()):
+                    for rank, prediction in enumerate(row_results):
+                        prediction["contributions"] = dict(zip(self.feature_names, row_contributions[rank]))
+            
+            return results
+            
+        except Exception as e:
+            print(f"Error making prediction: {e}")
+            return None
+    
+    def _generate_reasons(self, feature_array):
+        """Explanation for every row of an N x 7 feature array via the reason table"""
+        bands = []
+        for feature in self.reason_features:
+            low, high, _ = REASON_BANDS[feature]
+            values = feature_array[:, self.feature_names.index(feature)]
+            bands.append((values >= low).astype(np.intp) + (values > high))
+        
+        return self.reason_table[bands[0], bands[1]]
+    
+    def _generate_reason(self, features):
+        """Generate explanation for the crop recommendation"""
+        bands = []
+        for feature in self.reason_features:
+            low, high, _ = REASON_BANDS[feature]
+            value = features[feature]
+            bands.append(0 if value < low else 2 if value > high else 1)
+        
+        return self.reason_table[bands[0], bands[1]]
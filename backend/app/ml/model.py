@@ -1,23 +1,56 @@
-import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import LabelEncoder
-from sklearn.metrics import classification_report, accuracy_score
 import joblib
 import os
+import time
 from pathlib import Path
 
-class CropRecommendationModel:
-    def __init__(self):
-        self.model = None
-        self.label_encoder = None
-        self.feature_names = ['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall']
-        self.model_path = Path(__file__).parent / 'trained_model.joblib'
-        self.encoder_path = Path(__file__).parent / 'label_encoder.joblib'
+from .compiled_forest import CompiledForest
+from .inference import InferenceModel
+
+# Default dataset used by train_model
+DEFAULT_DATASET = Path(__file__).parent.parent.parent / 'data' / 'crop_recommendation.csv'
+
+# Random forest hyperparameters used by train_model
+DEFAULT_PARAMS = {
+    'n_estimators': 100,
+    'max_depth': 10,
+    'random_state': 42,
+    'min_samples_split': 5,
+    'min_samples_leaf': 2
+}
+
+# Estimators CropRecommendationModel can train, with their default hyperparameters
+MODEL_TYPE_PARAMS = {
+    'random_forest': DEFAULT_PARAMS,
+    'xgboost': {
+        'tree_method': 'hist',
+        'n_estimators': 200,
+        'max_depth': 6,
+        'learning_rate': 0.1,
+        'random_state': 42
+    },
+    'hist_gradient_boosting': {
+        'max_iter': 200,
+        'learning_rate': 0.1,
+        'random_state': 42
+    }
+}
+
+class CropRecommendationModel(InferenceModel):
+    """
+    InferenceModel plus training and saving. pandas and scikit-learn are
+    imported by the methods that need them, so importing this module stays
+    as cheap as importing inference.py.
+    """
+    
+    def __init__(self, engine=None, model_dir=None, model_type=None):
+        super().__init__(engine=engine, model_dir=model_dir)
+        # Estimator trained by train_model: random_forest, xgboost or hist_gradient_boosting
+        self.model_type = model_type or os.getenv("MODEL_TYPE", "random_forest")
         
     def load_data(self, csv_path):
         """Load and preprocess the crop recommendation dataset"""
+        import pandas as pd
         try:
             df = pd.read_csv(csv_path)
             print(f"Dataset loaded successfully with shape: {df.shape}")
@@ -29,6 +62,8 @@ class CropRecommendationModel:
     
     def preprocess_data(self, df):
         """Preprocess the data for training"""
+        from sklearn.preprocessing import LabelEncoder
+        
         # Separate features and target
         X = df[self.feature_names]
         y = df['label']
@@ -39,11 +74,39 @@ class CropRecommendationModel:
         
         return X, y_encoded, y
     
-    def train_model(self, csv_path=None):
+    def split_data(self, X, y_encoded):
+        """Train/test split shared by every training entry point"""
+        from sklearn.model_selection import train_test_split
+        return train_test_split(
+            X, y_encoded, test_size=0.2, random_state=42, stratify=y_encoded
+        )
+    
+    def build_estimator(self, params=None):
+        """Unfitted estimator for the configured model type, with params overriding the defaults"""
+        from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+        
+        if self.model_type not in MODEL_TYPE_PARAMS:
+            raise ValueError(f"Unknown model type: {self.model_type}")
+        params = {**MODEL_TYPE_PARAMS[self.model_type], **(params or {})}
+        
+        if self.model_type == 'xgboost':
+            try:
+                from xgboost import XGBClassifier
+            except ImportError:
+                raise ImportError("MODEL_TYPE=xgboost requires the xgboost package")
+            return XGBClassifier(**params)
+        if self.model_type == 'hist_gradient_boosting':
+            return HistGradientBoostingClassifier(**params)
+        return RandomForestClassifier(**params)
+    
+    def train_model(self, csv_path=None, params=None):
         """Train the crop recommendation model"""
+        from sklearn.inspection import permutation_importance
+        from sklearn.metrics import classification_report, accuracy_score
+        
         if csv_path is None:
             # Default path to the dataset
-            csv_path = Path(__file__).parent.parent.parent / 'data' / 'crop_recommendation.csv'
+            csv_path = DEFAULT_DATASET
         
         # Load data
         df = self.load_data(csv_path)
@@ -54,26 +117,38 @@ class CropRecommendationModel:
         X, y_encoded, y_original = self.preprocess_data(df)
         
         # Split data
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y_encoded, test_size=0.2, random_state=42, stratify=y_encoded
-        )
+        X_train, X_test, y_train, y_test = self.split_data(X, y_encoded)
         
-        # Train Random Forest model
-        self.model = RandomForestClassifier(
-            n_estimators=100,
-            max_depth=10,
-            random_state=42,
-            min_samples_split=5,
-            min_samples_leaf=2
-        )
+        # Train the configured model type
+        self.model = self.build_estimator(params)
         
-        print("Training model...")
+        print(f"Training {self.model_type} model...")
+        started = time.perf_counter()
         self.model.fit(X_train, y_train)
+        training_seconds = time.perf_counter() - started
+        
+        # Reasons need global feature importances; estimators without them get
+        # permutation importances, stored on the estimator so they persist with it
+        if not hasattr(self.model, 'feature_importances_'):
+            importances = permutation_importance(
+                self.model, X_test, y_test, n_repeats=5, random_state=42
+            ).importances_mean
+            self.model.feature_importances_ = np.clip(importances, 0, None)
+        
+        self._prepare_inference()
         
         # Evaluate model
         y_pred = self.model.predict(X_test)
         accuracy = accuracy_score(y_test, y_pred)
         
+        self.training_metrics = {
+            "accuracy": float(accuracy),
+            "training_seconds": round(training_seconds, 3),
+            "train_rows": len(X_train),
+            "test_rows": len(X_test),
+            "dataset": str(csv_path)
+        }
+        
         print(f"Model Accuracy: {accuracy:.4f}")
         print("\nClassification Report:")
         print(classification_report(y_test, y_pred, 
@@ -86,159 +161,37 @@ class CropRecommendationModel:
     
     def save_model(self):
         """Save the trained model and label encoder"""
+        from sklearn.ensemble import RandomForestClassifier
+        
         try:
             os.makedirs(self.model_path.parent, exist_ok=True)
             joblib.dump(self.model, self.model_path)
             joblib.dump(self.label_encoder, self.encoder_path)
             print(f"Model saved to {self.model_path}")
             print(f"Label encoder saved to {self.encoder_path}")
+            if isinstance(self.model, RandomForestClassifier):
+                self.save_compiled_model()
+            elif self.compiled_path.exists():
+                # A compiled forest left by an earlier model would shadow this one under MODEL_MMAP
+                os.remove(self.compiled_path)
+            if self.compact_path.exists():
+                # Same for a compact export of an earlier model under MODEL_COMPACT
+                os.remove(self.compact_path)
         except Exception as e:
             print(f"Error saving model: {e}")
     
-    def load_model(self):
-        """Load the trained model and label encoder"""
-        try:
-            if self.model_path.exists() and self.encoder_path.exists():
-                self.model = joblib.load(self.model_path)
-                self.label_encoder = joblib.load(self.encoder_path)
-                print("Model and encoder loaded successfully")
-                return True
-            else:
-                print("Model files not found. Please train the model first.")
-                return False
-        except Exception as e:
-            print(f"Error loading model: {e}")
-            return False
-    
-    def predict_crop(self, features):
-        """
-        Predict crop recommendation for given features
-        
-        Args:
-            features (dict): Dictionary with keys: N, P, K, temperature, humidity, ph, rainfall
-        
-        Returns:
-            list: Top 3 crop recommendations with scores and reasons
-        """
-        if self.model is None or self.label_encoder is None:
-            if not self.load_model():
-                return None
-        
-        try:
-            # Convert features to numpy array
-            feature_array = np.array([[
-                features['N'],
-                features['P'], 
-                features['K'],
-                features['temperature'],
-                features['humidity'],
-                features['ph'],
-                features['rainfall']
-            ]])
-            
-            # Get prediction probabilities
-            probabilities = self.model.predict_proba(feature_array)[0]
-            
-            # Get feature importances for explanations
-            feature_importances = self.model.feature_importances_
-            
-            # Create recommendations
-            recommendations = []
-            
-            # Get top 3 predictions
-            top_indices = np.argsort(probabilities)[::-1][:3]
-            
-            for i, idx in enumerate(top_indices):
-                crop_name = self.label_encoder.classes_[idx]
-                score = probabilities[idx]
-                
-                # Generate reason based on feature importance and values
-                reason = self._generate_reason(features, feature_importances, crop_name)
-                
-                recommendations.append({
-                    "crop": crop_name,
-                    "score": float(score),
-                    "reason": reason
-                })
-            
-            return recommendations
-            
-        except Exception as e:
-            print(f"Error making prediction: {e}")
-            return None
+    def save_compiled_model(self):
+        """Save an uncompressed, mmap-friendly artifact of the compiled forest"""
+        artifact = {
+            "forest": CompiledForest.from_sklearn(self.model).to_arrays(),
+            "classes": np.asarray(self.label_encoder.classes_),
+            "feature_names": self.feature_names,
+            "feature_importances": np.asarray(self.model.feature_importances_)
+        }
+        # compress=0 keeps the arrays as raw buffers that joblib can memory-map
+        joblib.dump(artifact, self.compiled_path, compress=0)
+        print(f"Compiled model saved to {self.compiled_path}")
     
-    def _generate_reason(self, features, importances, crop):
-        """Generate explanation for the crop recommendation"""
-        # Feature importance mapping
-        feature_importance_map = dict(zip(self.feature_names, importances))
-        
-        # Get top 2 most important features
-        sorted_features = sorted(feature_importance_map.items(), 
-                               key=lambda x: x[1], reverse=True)[:2]
-        
-        reasons = []
-        
-        for feature, importance in sorted_features:
-            value = features[feature]
-            
-            if feature == 'N':
-                if value > 80:
-                    reasons.append("high nitrogen content")
-                elif value < 40:
-                    reasons.append("low nitrogen requirement")
-                else:
-                    reasons.append("moderate nitrogen levels")
-            
-            elif feature == 'P':
-                if value > 50:
-                    reasons.append("high phosphorus availability")
-                elif value < 20:
-                    reasons.append("low phosphorus requirement")
-                else:
-                    reasons.append("adequate phosphorus levels")
-            
-            elif feature == 'K':
-                if value > 40:
-                    reasons.append("high potassium content")
-                elif value < 20:
-                    reasons.append("low potassium requirement")
-                else:
-                    reasons.append("suitable potassium levels")
-            
-            elif feature == 'temperature':
-                if value > 30:
-                    reasons.append("warm climate preference")
-                elif value < 20:
-                    reasons.append("cool climate suitability")
-                else:
-                    reasons.append("moderate temperature range")
-            
-            elif feature == 'humidity':
-                if value > 70:
-                    reasons.append("high humidity tolerance")
-                elif value < 40:
-                    reasons.append("low humidity adaptation")
-                else:
-                    reasons.append("moderate humidity conditions")
-            
-            elif feature == 'ph':
-                if value > 7.5:
-                    reasons.append("alkaline soil preference")
-                elif value < 6.0:
-                    reasons.append("acidic soil tolerance")
-                else:
-                    reasons.append("neutral pH suitability")
-            
-            elif feature == 'rainfall':
-                if value > 200:
-                    reasons.append("high rainfall requirement")
-                elif value < 100:
-                    reasons.append("drought tolerance")
-                else:
-                    reasons.append("moderate water needs")
-        
-        return f"Suitable due to {' and '.join(reasons)}"
-
 # Function to train model if run directly
 if __name__ == "__main__":
     model = CropRecommendationModel()
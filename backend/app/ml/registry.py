@@ -0,0 +1,177 @@
+import argparse
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+from .model import CropRecommendationModel, MODEL_TYPE_PARAMS
+
+# Versioned model artifacts live in <MODEL_REGISTRY_DIR>/<version>/
+DEFAULT_REGISTRY_DIR = Path(__file__).parent / 'registry'
+
+METADATA_FILE = 'metadata.json'
+ACTIVE_FILE = 'ACTIVE'
+
+class ModelRegistry:
+    """
+    Directory of versioned model artifacts plus metadata.
+
+    Each version is a directory with the usual joblib artifacts and a
+    metadata.json. Versions are written to a temporary directory and renamed
+    into place, so readers never see a half-written version. The ACTIVE file
+    names the version servers should load.
+    """
+
+    def __init__(self, root=None):
+        self.root = Path(root or os.getenv("MODEL_REGISTRY_DIR") or DEFAULT_REGISTRY_DIR)
+
+    def version_dir(self, version):
+        return self.root / version
+
+    def list_versions(self):
+        """Metadata of every published version, oldest first"""
+        if not self.root.exists():
+            return []
+
+        versions = []
+        for path in sorted(self.root.iterdir()):
+            metadata_path = path / METADATA_FILE
+            if path.is_dir() and metadata_path.exists():
+                with open(metadata_path) as f:
+                    versions.append(json.load(f))
+        return versions
+
+    def get_metadata(self, version):
+        """Metadata of one version, or None if it does not exist"""
+        metadata_path = self.version_dir(version) / METADATA_FILE
+        if not metadata_path.exists():
+            return None
+        with open(metadata_path) as f:
+            return json.load(f)
+
+    def _next_version(self):
+        existing = [
+            int(path.name[1:]) for path in self.root.glob('v*')
+            if path.is_dir() and path.name[1:].isdigit()
+        ]
+        return f"v{max(existing, default=0) + 1:04d}"
+
+    def publish(self, model, metrics=None, train=None):
+        """
+        Store a model as a new version
+
+        Args:
+            model (CropRecommendationModel): Model to store; trained in place
+                when `train` is a dataset path (or True for the default dataset)
+            metrics (dict): Extra metadata to record (accuracy, latency, ...)
+            train: Train the model into the new version instead of saving an existing one
+
+        Returns:
+            str: The new version name
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix='.staging-', dir=self.root))
+
+        try:
+            model.model_path = staging / model.model_path.name
+            model.encoder_path = staging / model.encoder_path.name
+            model.compiled_path = staging / model.compiled_path.name
+            model.compact_path = staging / model.compact_path.name
+
+            if train:
+                if not model.train_model(None if train is True else train):
+                    raise RuntimeError("Model training failed")
+            else:
+                model.save_model()
+
+            metadata = {
+                "created_at": datetime.utcnow().isoformat(),
+                "feature_names": model.feature_names,
+                "classes": [str(c) for c in model.classes],
+                "model_type": type(model.model).__name__,
+                "params": {
+                    key: value for key, value in model.model.get_params().items()
+                    if isinstance(value, (int, float, str, bool, type(None)))
+                },
+                **(model.training_metrics or {}),
+                **(metrics or {})
+            }
+
+            # Claim a version name atomically; retry if another publisher won the race
+            while True:
+                version = self._next_version()
+                metadata["version"] = version
+                with open(staging / METADATA_FILE, 'w') as f:
+                    json.dump(metadata, f, indent=2)
+                try:
+                    os.rename(staging, self.version_dir(version))
+                    break
+                except OSError:
+                    if not self.version_dir(version).exists():
+                        raise
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        model.model_path = self.version_dir(version) / model.model_path.name
+        model.encoder_path = self.version_dir(version) / model.encoder_path.name
+        model.compiled_path = self.version_dir(version) / model.compiled_path.name
+        model.compact_path = self.version_dir(version) / model.compact_path.name
+        model.version = version
+        print(f"Published model version {version} to {self.version_dir(version)}")
+        return version
+
+    def model_for(self, version, **kwargs):
+        """Unloaded CropRecommendationModel pointing at a version's artifacts"""
+        if self.get_metadata(version) is None:
+            raise KeyError(f"Unknown model version: {version}")
+        model = CropRecommendationModel(model_dir=self.version_dir(version), **kwargs)
+        model.version = version
+        return model
+
+    def active_version(self):
+        """Version named by the ACTIVE file, or None"""
+        active_path = self.root / ACTIVE_FILE
+        if not active_path.exists():
+            return None
+        version = active_path.read_text().strip()
+        return version if self.get_metadata(version) is not None else None
+
+    def set_active(self, version):
+        """Point ACTIVE at a version (atomic replace)"""
+        if self.get_metadata(version) is None:
+            raise KeyError(f"Unknown model version: {version}")
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.root / f".{ACTIVE_FILE}.tmp"
+        tmp_path.write_text(version)
+        os.replace(tmp_path, self.root / ACTIVE_FILE)
+
+    def active_signature(self):
+        """Cheap change detector for the ACTIVE file"""
+        try:
+            stat = (self.root / ACTIVE_FILE).stat()
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def active_model(self, **kwargs):
+        """Unloaded model for the active version, or None if there is none"""
+        version = self.active_version()
+        return self.model_for(version, **kwargs) if version else None
+
+# Train a new version from the command line
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train and publish a new model version")
+    parser.add_argument("--csv", help="Training dataset (defaults to data/crop_recommendation.csv)")
+    parser.add_argument("--model-type", choices=list(MODEL_TYPE_PARAMS),
+                        help="Estimator to train (defaults to MODEL_TYPE)")
+    parser.add_argument("--activate", action="store_true", help="Make the new version active")
+    args = parser.parse_args()
+
+    registry = ModelRegistry()
+    version = registry.publish(CropRecommendationModel(model_type=args.model_type), train=args.csv or True)
+    if args.activate:
+        registry.set_active(version)
+        print(f"Active model version: {version}")
@@ -0,0 +1,163 @@
+import asyncio
+import inspect
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the batch size histogram buckets
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+class MicroBatchScheduler:
+    """
+    Coalesce concurrent single-row predictions into batched inference calls.
+
+    Requests that arrive within `window_ms` of the first queued request (or
+    until `max_batch_size` rows are waiting) are scored together with one
+    call to `predict_batch`, and each caller's future is resolved with its
+    own row of the result.
+    """
+
+    def __init__(self, predict_batch, window_ms=2.0, max_batch_size=64):
+        """
+        Args:
+            predict_batch (callable): Takes a list of feature dicts and returns
+                one result per row in the same order (sync or async)
+            window_ms (float): How long to wait for more requests after the first one
+            max_batch_size (int): Flush as soon as this many requests are waiting
+        """
+        self.predict_batch = predict_batch
+        self.window_ms = window_ms
+        self.max_batch_size = max(1, int(max_batch_size))
+
+        self._queue = None
+        self._batch_full = None
+        self._worker = None
+        # Rows taken off the queue whose futures are not resolved yet
+        self._in_flight = []
+
+        # Metrics
+        self._batches = 0
+        self._rows = 0
+        self._failed_batches = 0
+        self._max_queue_depth = 0
+        self._total_queue_wait = 0.0
+        self._total_inference_time = 0.0
+        self._batch_size_counts = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+
+    def _ensure_started(self):
+        """Start the background worker on the running event loop"""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._batch_full = asyncio.Event()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, features):
+        """Queue one row for the next batch and wait for its result"""
+        self._ensure_started()
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((features, future, time.perf_counter()))
+
+        depth = self._queue.qsize()
+        self._max_queue_depth = max(self._max_queue_depth, depth)
+        # The worker may already hold the first row of the batch it is collecting
+        if depth + len(self._in_flight) >= self.max_batch_size:
+            self._batch_full.set()
+
+        return await future
+
+    async def _run(self):
+        """Collect batches from the queue and run them until cancelled"""
+        while True:
+            first = await self._queue.get()
+            self._in_flight = batch = [first]
+
+            # Wait for the window to expire or the batch to fill up
+            if self._queue.qsize() + 1 < self.max_batch_size:
+                self._batch_full.clear()
+                try:
+                    await asyncio.wait_for(self._batch_full.wait(), self.window_ms / 1000)
+                except asyncio.TimeoutError:
+                    pass
+
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            await self._execute(batch)
+            self._in_flight = []
+
+    async def _execute(self, batch):
+        """Run one batched inference and resolve every caller's future"""
+        started = time.perf_counter()
+        self._total_queue_wait += sum(started - enqueued for _, _, enqueued in batch)
+
+        try:
+            results = self.predict_batch([features for features, _, _ in batch])
+            if inspect.isawaitable(results):
+                results = await results
+            if results is None:
+                results = [None] * len(batch)
+        except Exception as e:
+            logger.error(f"Batched inference failed for {len(batch)} rows: {e}")
+            self._failed_batches += 1
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._total_inference_time += time.perf_counter() - started
+
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+        self._record_batch(len(batch))
+
+    def _record_batch(self, size):
+        self._batches += 1
+        self._rows += size
+        for i, bound in enumerate(BATCH_SIZE_BUCKETS):
+            if size <= bound:
+                self._batch_size_counts[i] += 1
+                break
+        else:
+            self._batch_size_counts[-1] += 1
+
+    def stats(self):
+        """Queue depth and batch size metrics for tuning the window"""
+        labels = [f"<={bound}" for bound in BATCH_SIZE_BUCKETS] + [f">{BATCH_SIZE_BUCKETS[-1]}"]
+        return {
+            "window_ms": self.window_ms,
+            "max_batch_size": self.max_batch_size,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue_depth": self._max_queue_depth,
+            "batches": self._batches,
+            "rows": self._rows,
+            "failed_batches": self._failed_batches,
+            "avg_batch_size": round(self._rows / self._batches, 2) if self._batches else 0,
+            "avg_queue_wait_ms": round(self._total_queue_wait / self._rows * 1000, 3) if self._rows else 0,
+            "avg_inference_ms": round(self._total_inference_time / self._batches * 1000, 3) if self._batches else 0,
+            "batch_size_histogram": dict(zip(labels, self._batch_size_counts))
+        }
+
+    async def close(self):
+        """Stop the worker; queued and in-flight callers get a cancellation error"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+        for _, future, _ in self._in_flight:
+            if not future.done():
+                future.cancel()
+        self._in_flight = []
+
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, future, _ = self._queue.get_nowait()
+                if not future.done():
+                    future.cancel()
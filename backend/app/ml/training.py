@@ -0,0 +1,238 @@
+import argparse
+import io
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score
+
+from .model import CropRecommendationModel, DEFAULT_DATASET, DEFAULT_PARAMS
+from .registry import ModelRegistry
+
+# Search space explored by default
+DEFAULT_GRID = {
+    'n_estimators': [50, 100, 200],
+    'max_depth': [8, 10, 16, None],
+    'min_samples_leaf': [1, 2, 4]
+}
+
+# Single-row p99 latency a candidate must meet to be selected
+LATENCY_BUDGET_MS = float(os.getenv("TRAINING_LATENCY_BUDGET_MS", "10"))
+
+REPORT_FILE = 'training_report.json'
+
+# Training data of a search worker, set once by the pool initializer
+_search_data = None
+
+def _init_search_worker(X_fit, y_fit, X_val, y_val):
+    global _search_data
+    _search_data = (X_fit, y_fit, X_val, y_val)
+
+def serialized_size(estimator):
+    """Size in bytes of an estimator's joblib artifact"""
+    buffer = io.BytesIO()
+    joblib.dump(estimator, buffer)
+    return buffer.getbuffer().nbytes
+
+def _fit_candidate(params):
+    """Fit one candidate on a single core and score it on the validation split"""
+    X_fit, y_fit, X_val, y_val = _search_data
+
+    estimator = RandomForestClassifier(**{**DEFAULT_PARAMS, **params, 'n_jobs': 1})
+    started = time.perf_counter()
+    estimator.fit(X_fit, y_fit)
+    training_seconds = time.perf_counter() - started
+
+    return {
+        "params": params,
+        "val_accuracy": float(accuracy_score(y_val, estimator.predict(X_val))),
+        "training_seconds": round(training_seconds, 3),
+        "model_size_bytes": serialized_size(estimator),
+        "n_nodes": int(sum(tree.tree_.node_count for tree in estimator.estimators_))
+    }, estimator
+
+def expand_grid(grid):
+    """Every combination of a {param: [values]} grid as a list of dicts"""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+def measure_latency(model, X, n_calls=300, warm_up=20):
+    """
+    Single-row predict_crop latency, the path a /predict request takes
+
+    Args:
+        model (CropRecommendationModel): Model ready for inference
+        X (DataFrame): Rows to cycle through
+        n_calls (int): Number of timed predictions
+
+    Returns:
+        dict: p50 and p99 latency in milliseconds
+    """
+    rows = X.to_dict('records')
+    for i in range(warm_up):
+        model.predict_crop(rows[i % len(rows)])
+
+    timings = np.empty(n_calls)
+    for i in range(n_calls):
+        started = time.perf_counter()
+        model.predict_crop(rows[i % len(rows)])
+        timings[i] = time.perf_counter() - started
+
+    return {
+        "latency_p50_ms": round(float(np.percentile(timings, 50)) * 1000, 3),
+        "latency_p99_ms": round(float(np.percentile(timings, 99)) * 1000, 3)
+    }
+
+def select_candidate(candidates, latency_budget_ms):
+    """Most accurate candidate (on the validation split) within the latency budget, or the fastest if none qualifies"""
+    within_budget = [c for c in candidates if c["latency_p99_ms"] <= latency_budget_ms]
+    if within_budget:
+        return max(within_budget, key=lambda c: (c["val_accuracy"], -c["latency_p99_ms"])), True
+    return min(candidates, key=lambda c: c["latency_p99_ms"]), False
+
+def run_search(csv_path=None, grid=None, latency_budget_ms=LATENCY_BUDGET_MS,
+               workers=None, engine=None):
+    """
+    Fit every grid candidate in a process pool and pick one for serving
+
+    Candidates are fitted in parallel; latency is measured afterwards one
+    candidate at a time so the timings are not skewed by the other fits.
+    Candidates are compared on a validation split of the training rows. The
+    selected one is refitted on the whole training split, and the test split
+    only measures its accuracy for the report.
+
+    Returns:
+        tuple: (CropRecommendationModel serving the selected candidate, report dict)
+    """
+    csv_path = csv_path or DEFAULT_DATASET
+    base = CropRecommendationModel(engine=engine)
+    df = base.load_data(csv_path)
+    if df is None:
+        raise RuntimeError(f"Could not load dataset {csv_path}")
+
+    X, y_encoded, _ = base.preprocess_data(df)
+    X_train, X_test, y_train, y_test = base.split_data(X, y_encoded)
+    X_fit, X_val, y_fit, y_val = base.split_data(X_train, y_train)
+
+    candidates_params = expand_grid(grid or DEFAULT_GRID)
+    workers = workers or os.cpu_count() or 1
+    print(f"Searching {len(candidates_params)} candidates on {workers} worker(s)...")
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_search_worker,
+                             initargs=(X_fit, y_fit, X_val, y_val)) as pool:
+        fitted = list(pool.map(_fit_candidate, candidates_params))
+    search_seconds = time.perf_counter() - started
+
+    candidates = []
+    for result, estimator in fitted:
+        candidate_model = CropRecommendationModel(engine=engine)
+        candidate_model.use_estimator(estimator, base.label_encoder)
+        result.update(measure_latency(candidate_model, X_val))
+        candidates.append(result)
+        print(f"  {result['params']}: validation accuracy {result['val_accuracy']:.4f}, "
+              f"p50 {result['latency_p50_ms']:.2f} ms, p99 {result['latency_p99_ms']:.2f} ms, "
+              f"{result['model_size_bytes'] / 1024:.0f} KB")
+
+    selected, within_budget = select_candidate(candidates, latency_budget_ms)
+    if not within_budget:
+        print(f"Warning: no candidate meets the {latency_budget_ms} ms budget; using the fastest")
+
+    best_accuracy = max(c["val_accuracy"] for c in candidates)
+
+    # Refit the selected parameters on every training row and score them once on the test split
+    estimator = RandomForestClassifier(**{**DEFAULT_PARAMS, **selected["params"]})
+    started = time.perf_counter()
+    estimator.fit(X_train, y_train)
+    training_seconds = time.perf_counter() - started
+    test_accuracy = float(accuracy_score(y_test, estimator.predict(X_test)))
+    report = {
+        "dataset": str(csv_path),
+        "engine": base.engine,
+        "latency_budget_ms": latency_budget_ms,
+        "within_budget": within_budget,
+        "workers": workers,
+        "search_seconds": round(search_seconds, 3),
+        "validation_rows": len(X_val),
+        "selected": {**selected, "test_accuracy": test_accuracy},
+        "best_val_accuracy": best_accuracy,
+        "candidates": sorted(candidates, key=lambda c: (-c["val_accuracy"], c["latency_p99_ms"]))
+    }
+
+    model = CropRecommendationModel(engine=engine)
+    model.use_estimator(estimator, base.label_encoder, {
+        "accuracy": test_accuracy,
+        "training_seconds": round(training_seconds, 3),
+        "train_rows": len(X_train),
+        "test_rows": len(X_test),
+        "dataset": str(csv_path)
+    })
+
+    print(f"Selected {selected['params']} (validation accuracy {selected['val_accuracy']:.4f}, "
+          f"test accuracy {test_accuracy:.4f}, p99 {selected['latency_p99_ms']:.2f} ms; "
+          f"best validation accuracy {best_accuracy:.4f})")
+    return model, report
+
+def write_report(report, directory, filename=REPORT_FILE):
+    path = Path(directory) / filename
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Comparison report saved to {path}")
+    return path
+
+def _parse_values(spec, cast):
+    return [None if value.strip().lower() == 'none' else cast(value) for value in spec.split(',')]
+
+# Run the search from the command line
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel hyperparameter search with a latency budget")
+    parser.add_argument("--csv", help="Training dataset (defaults to data/crop_recommendation.csv)")
+    parser.add_argument("--n-estimators", default=",".join(map(str, DEFAULT_GRID['n_estimators'])))
+    parser.add_argument("--max-depth", default=",".join(map(str, DEFAULT_GRID['max_depth'])),
+                        help="Comma separated; 'none' for unlimited depth")
+    parser.add_argument("--min-samples-leaf", default=",".join(map(str, DEFAULT_GRID['min_samples_leaf'])))
+    parser.add_argument("--latency-budget-ms", type=float, default=LATENCY_BUDGET_MS,
+                        help="Maximum single-row p99 latency")
+    parser.add_argument("--workers", type=int, help="Search processes (defaults to all cores)")
+    parser.add_argument("--engine", choices=["sklearn", "compiled"],
+                        help="Inference engine to measure latency with (defaults to INFERENCE_ENGINE)")
+    parser.add_argument("--output-dir", help="Save artifacts here instead of publishing to the registry")
+    parser.add_argument("--activate", action="store_true", help="Make the new registry version active")
+    args = parser.parse_args()
+
+    grid = {
+        'n_estimators': _parse_values(args.n_estimators, int),
+        'max_depth': _parse_values(args.max_depth, int),
+        'min_samples_leaf': _parse_values(args.min_samples_leaf, int)
+    }
+    model, report = run_search(args.csv, grid, args.latency_budget_ms, args.workers, args.engine)
+
+    selected = report["selected"]
+    metrics = {
+        "latency_p50_ms": selected["latency_p50_ms"],
+        "latency_p99_ms": selected["latency_p99_ms"],
+        "model_size_bytes": selected["model_size_bytes"],
+        "latency_budget_ms": args.latency_budget_ms
+    }
+
+    if args.output_dir:
+        output_dir = Path(args.output_dir)
+        model.model_path = output_dir / model.model_path.name
+        model.encoder_path = output_dir / model.encoder_path.name
+        model.compiled_path = output_dir / model.compiled_path.name
+        model.compact_path = output_dir / model.compact_path.name
+        model.save_model()
+        write_report(report, output_dir)
+    else:
+        registry = ModelRegistry()
+        version = registry.publish(model, metrics=metrics)
+        write_report({**report, "version": version}, registry.version_dir(version))
+        if args.activate:
+            registry.set_active(version)
+            print(f"Active model version: {version}")
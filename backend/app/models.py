@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 from bson import ObjectId
 
@@ -66,6 +66,9 @@ class CropRecommendation(BaseModel):
     crop: str = Field(..., description="Recommended crop name")
     score: float = Field(..., ge=0, le=1, description="Confidence score (0-1)")
     reason: str = Field(..., description="Explanation for the recommendation")
+    contributions: Optional[Dict[str, float]] = Field(
+        None, description="Per-feature change in this crop's score along the tree paths (explain=true)"
+    )
     
     class Config:
         json_schema_extra = {
@@ -103,6 +106,26 @@ class CropPredictionResponse(BaseModel):
             }
         }
 
+class CropBatchPredictionRequest(BaseModel):
+    rows: List[CropPredictionRequest] = Field(
+        ..., min_length=1, max_length=10000,
+        description="Soil and weather samples to score (max 10000 per request)"
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "rows": [
+                    {"N": 90, "P": 42, "K": 43, "temperature": 25, "humidity": 80, "ph": 6.5, "rainfall": 200},
+                    {"N": 20, "P": 60, "K": 20, "temperature": 28, "humidity": 45, "ph": 7.2, "rainfall": 70}
+                ]
+            }
+        }
+
+class CropBatchPredictionResponse(BaseModel):
+    results: List[CropPredictionResponse] = Field(..., description="Predictions in the same order as the input rows")
+    count: int = Field(..., description="Number of scored rows")
+
 class FeedbackResponse(BaseModel):
     message: str = Field(..., description="Response message")
     feedback_id: str = Field(..., description="Unique feedback identifier")
@@ -0,0 +1,236 @@
+import asyncio
+import cProfile
+import os
+import pstats
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from .metrics import _route_label
+
+# Profile a request when it carries X-Profile-Token with this value (defaults to ADMIN_TOKEN; off when neither is set)
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN") or os.getenv("ADMIN_TOKEN") or ""
+# Fraction of requests profiled without the header
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+# cprofile: deterministic, event loop thread only; sampling: stack samples of all threads
+PROFILER = os.getenv("PROFILER", "cprofile")
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "1"))
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", Path(__file__).parent.parent / "profiles"))
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "200"))
+
+PROFILE_HEADER = b"x-profile-token"
+EXTENSIONS = {"cprofile": ".pstats", "sampling": ".collapsed"}
+
+class StackSampler:
+    """
+    Minimal sampling profiler: a background thread records the stacks of all
+    other threads every `interval` seconds, in collapsed ("folded") format.
+
+    Unlike cProfile it also sees work running in the inference thread pool.
+    """
+
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                names = []
+                while frame is not None:
+                    code = frame.f_code
+                    names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(names))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+class ProfileStore:
+    """
+    Directory of per-request profiles, oldest deleted beyond `max_files`.
+
+    File names carry the metadata:
+    <epoch ms>-<id>-<duration ms>ms-<method>-<route>.<pstats|collapsed>
+    """
+
+    def __init__(self, directory=PROFILE_DIR, max_files=PROFILE_MAX_FILES):
+        self.directory = Path(directory)
+        self.max_files = max_files
+
+    def path_for(self, profile_id, duration_ms, method, route, kind):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        route = re.sub(r"[^A-Za-z0-9_]+", "_", route).strip("_") or "root"
+        name = f"{int(time.time() * 1000)}-{profile_id}-{int(duration_ms)}ms-{method}-{route}{EXTENSIONS[kind]}"
+        return self.directory / name
+
+    def rotate(self):
+        files = self._files()
+        for path in files[:max(0, len(files) - self.max_files)]:
+            path.unlink(missing_ok=True)
+
+    def _files(self):
+        if not self.directory.exists():
+            return []
+        return sorted(
+            (path for path in self.directory.iterdir() if path.suffix in EXTENSIONS.values()),
+            key=lambda path: path.name
+        )
+
+    def list(self):
+        """Metadata of every stored profile, newest first"""
+        profiles = []
+        for path in reversed(self._files()):
+            parts = path.stem.split("-", 4)
+            if len(parts) != 5:
+                continue
+            created, profile_id, duration, method, route = parts
+            profiles.append({
+                "id": profile_id,
+                "file": path.name,
+                "kind": "cprofile" if path.suffix == ".pstats" else "sampling",
+                "method": method,
+                "route": route,
+                "duration_ms": int(duration[:-2]),
+                "size_bytes": path.stat().st_size,
+                "created_at": datetime.utcfromtimestamp(int(created) / 1000).isoformat()
+            })
+        return profiles
+
+    def select(self, ids=None, route=None):
+        """Profiles filtered by id list and/or route substring"""
+        return [
+            profile for profile in self.list()
+            if (not ids or profile["id"] in ids) and (not route or route in profile["route"])
+        ]
+
+    def top_functions(self, profiles, limit=30, sort="cumulative"):
+        """
+        Aggregate the selected profiles into their hottest functions
+
+        cProfile profiles are merged with pstats and sorted by `sort`
+        (cumulative or tottime). Sampled profiles report self and total
+        sample counts per frame.
+        """
+        pstats_files = [str(self.directory / p["file"]) for p in profiles if p["kind"] == "cprofile"]
+        collapsed_files = [self.directory / p["file"] for p in profiles if p["kind"] == "sampling"]
+        result = {"profiles": len(profiles)}
+
+        if pstats_files:
+            stats = pstats.Stats(*pstats_files)
+            key = 3 if sort == "cumulative" else 2
+            rows = sorted(stats.stats.items(), key=lambda item: item[1][key], reverse=True)[:limit]
+            result["cprofile"] = [
+                {
+                    "function": f"{func} ({os.path.basename(file)}:{line})",
+                    "calls": calls,
+                    "primitive_calls": primitive_calls,
+                    "tottime_ms": round(tottime * 1000, 3),
+                    "cumtime_ms": round(cumtime * 1000, 3)
+                }
+                for (file, line, func), (primitive_calls, calls, tottime, cumtime, _) in rows
+            ]
+
+        if collapsed_files:
+            self_samples, total_samples = Counter(), Counter()
+            for path in collapsed_files:
+                with open(path) as f:
+                    for line in f:
+                        stack, _, count = line.rstrip("\n").rpartition(" ")
+                        frames = stack.split(";")
+                        self_samples[frames[-1]] += int(count)
+                        for frame in set(frames):
+                            total_samples[frame] += int(count)
+            ranking = total_samples if sort == "cumulative" else self_samples
+            result["sampling"] = [
+                {"function": frame, "self_samples": self_samples[frame], "total_samples": total_samples[frame]}
+                for frame, _ in ranking.most_common(limit)
+            ]
+
+        return result
+
+# Global profile store
+profile_store = ProfileStore()
+
+class ProfilingMiddleware:
+    """
+    Pure ASGI middleware profiling requests on demand.
+
+    A request is profiled when its X-Profile-Token header matches
+    PROFILE_TOKEN, or at random with probability PROFILE_SAMPLE_RATE. Only one
+    request is profiled at a time; the profile's id is returned in the
+    X-Profile-Id response header. With cProfile, other requests interleaved on
+    the event loop during the profiled one are included in its profile.
+    """
+
+    def __init__(self, app, store=None, profiler=PROFILER, sample_rate=PROFILE_SAMPLE_RATE, token=PROFILE_TOKEN):
+        self.app = app
+        self.store = store or profile_store
+        self.profiler = profiler
+        self.sample_rate = sample_rate
+        self.token = token
+        self._active = False
+
+    def _wants_profile(self, scope):
+        if self.token:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER:
+                    return secrets.compare_digest(value.decode("latin-1"), self.token)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self._active or not self._wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        self._active = True
+        profile_id = uuid.uuid4().hex[:12]
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        if self.profiler == "sampling":
+            profiler = StackSampler(PROFILE_SAMPLE_INTERVAL_MS / 1000)
+            profiler.start()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        started = time.perf_counter()
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            if self.profiler == "sampling":
+                profiler.stop()
+            else:
+                profiler.disable()
+            self._active = False
+
+            path = self.store.path_for(profile_id, duration_ms, scope["method"], _route_label(scope), self.profiler)
+            dump = profiler.dump if self.profiler == "sampling" else profiler.dump_stats
+            await asyncio.to_thread(dump, path)
+            await asyncio.to_thread(self.store.rotate)
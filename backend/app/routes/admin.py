@@ -0,0 +1,136 @@
+from fastapi import APIRouter, HTTPException, Header, Depends, Query
+from typing import Optional
+import asyncio
+import logging
+import os
+import secrets
+
+from . import prediction
+from ..db import database_ops
+from ..profiling import profile_store
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Admin endpoints need the X-Admin-Token header; they are off without ADMIN_TOKEN"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(
+            status_code=403,
+            detail="Admin endpoints are disabled; set ADMIN_TOKEN to enable them"
+        )
+    if not secrets.compare_digest(x_admin_token or "", ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+# Create router
+router = APIRouter(prefix="/api/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+@router.get("/models")
+async def list_model_versions():
+    """List registry versions with their metadata and the version being served"""
+    try:
+        return {
+            "serving_version": prediction.crop_model.version,
+            "active_version": prediction.model_registry.active_version(),
+            "versions": prediction.model_registry.list_versions()
+        }
+    except Exception as e:
+        logger.error(f"Error listing model versions: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to list model versions: {str(e)}"
+        )
+
+@router.post("/models/{version}/activate")
+async def activate_model_version(version: str):
+    """
+    Load a model version in the background, warm it up and swap it in atomically
+    
+    - **version**: Registry version, e.g. `v0003`
+    """
+    try:
+        return await prediction.activate_model_version(version)
+    except KeyError:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Model version {version} not found"
+        )
+    except Exception as e:
+        logger.error(f"Error activating model version {version}: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to activate model version: {str(e)}"
+        )
+
+@router.post("/models/incremental-update")
+async def incremental_model_update(activate: bool = False):
+    """
+    Grow the model from feedback received since the last update and publish it as a new version
+    
+    - **activate**: Swap the new version in if one was published
+    """
+    if database_ops.db is None:
+        raise HTTPException(status_code=503, detail="Database is not available")
+    
+    # Training stack (pandas, scikit-learn) is only imported when an update runs
+    from ..ml.incremental import IncrementalTrainer
+    
+    try:
+        trainer = IncrementalTrainer(registry=prediction.model_registry)
+        report = await trainer.run(database_ops.db)
+        if activate and report["version"]:
+            report["activation"] = await prediction.activate_model_version(report["version"])
+        return report
+    except Exception as e:
+        logger.error(f"Error updating model from feedback: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to update model from feedback: {str(e)}"
+        )
+
+
+@router.get("/profiles")
+async def list_profiles():
+    """List stored request profiles, newest first"""
+    try:
+        profiles = profile_store.list()
+        return {"count": len(profiles), "profiles": profiles}
+    except Exception as e:
+        logger.error(f"Error listing profiles: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to list profiles: {str(e)}"
+        )
+
+@router.get("/profiles/top")
+async def top_profiled_functions(
+    ids: Optional[str] = None,
+    route: Optional[str] = None,
+    limit: int = Query(30, ge=1, le=500),
+    sort: str = Query("cumulative", pattern="^(cumulative|tottime)$")
+):
+    """
+    Aggregate stored profiles into their most expensive functions
+    
+    - **ids**: Comma-separated profile ids (defaults to all profiles)
+    - **route**: Only profiles whose route contains this text
+    - **limit**: Number of functions returned
+    - **sort**: `cumulative` (time including callees) or `tottime` (own time)
+    """
+    try:
+        selected = profile_store.select(
+            ids=set(filter(None, (ids or "").split(","))), route=route
+        )
+        if not selected:
+            raise HTTPException(status_code=404, detail="No matching profiles")
+        return await asyncio.to_thread(profile_store.top_functions, selected, limit, sort)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error aggregating profiles: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to aggregate profiles: {str(e)}"
+        )
@@ -0,0 +1,29 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from ..metrics import metrics
+from ..db import database_ops
+
+# Create router
+router = APIRouter(tags=["monitoring"])
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Request, stage, inference and database latency histograms in Prometheus text format"""
+    return PlainTextResponse(
+        metrics.render_prometheus(),
+        media_type="text/plain; version=0.0.4"
+    )
+
+@router.get("/metrics/summary")
+async def metrics_summary():
+    """Count, mean and estimated p50/p95/p99 latency in milliseconds for every histogram"""
+    return {
+        "enabled": metrics.enabled,
+        "metrics": metrics.summary()
+    }
+
+@router.get("/metrics/write-behind")
+async def write_behind_stats():
+    """Flushed, pending and failed document counts of the database write-behind queue"""
+    return database_ops.write_behind_stats()
@@ -1,16 +1,30 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import Dict, Any
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import ValidationError
+from typing import Dict, Any, List, Optional
+import asyncio
+import json
 import logging
+import os
+import time
 from datetime import datetime
 
 from ..models import (
     CropPredictionRequest, 
     CropPredictionResponse, 
     CropRecommendation,
+    CropBatchPredictionRequest,
+    CropBatchPredictionResponse,
     Recommendation
 )
 from ..ml.model import CropRecommendationModel
+from ..ml.scheduler import MicroBatchScheduler
+from ..ml.executor import create_inference_executor
+from ..ml.cache import PredictionCache, parse_precisions
+from ..ml.registry import ModelRegistry
+from ..ml.analysis import analysis_engine
 from ..db import database_ops
+from ..metrics import stage, timed_handler
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -18,32 +32,179 @@ logger = logging.getLogger(__name__)
 # Create router
 router = APIRouter(prefix="/api", tags=["predictions"])
 
-# Global model instance
-crop_model = CropRecommendationModel()
+# Versioned model artifacts; the active version is served if there is one
+model_registry = ModelRegistry()
+REGISTRY_WATCH_SECONDS = float(os.getenv("MODEL_REGISTRY_WATCH_SECONDS", "0"))
+
+# Global model instance, replaced as a whole by activate_model_version
+crop_model = model_registry.active_model() or CropRecommendationModel()
+
+# Load the model at import time so a pre-forking server (gunicorn --preload)
+# shares it copy-on-write with every worker
+if os.getenv("PRELOAD_MODEL", "false").lower() == "true":
+    crop_model.load_model()
+
+class ModelState:
+    """Readiness of the global model, set by warm_up_model at startup"""
+    ready: bool = False
+    training: bool = False
+    error: Optional[str] = None
+    cold_start_ms: Optional[float] = None
+
+model_state = ModelState()
+_training_task: Optional[asyncio.Task] = None
+_registry_watch_task: Optional[asyncio.Task] = None
+_swap_lock = asyncio.Lock()
+
+# Sample input used to warm up the model before serving traffic
+WARM_UP_FEATURES = {
+    'N': 90,
+    'P': 42,
+    'K': 43,
+    'temperature': 25,
+    'humidity': 80,
+    'ph': 6.5,
+    'rainfall': 200
+}
+
+# Inference runs off the event loop: "thread", "process" or "inline"
+INFERENCE_EXECUTOR = os.getenv("INFERENCE_EXECUTOR", "thread").lower()
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "0")) or None
+INFERENCE_START_METHOD = os.getenv("INFERENCE_START_METHOD", "spawn")
+
+inference_executor = create_inference_executor(
+    INFERENCE_EXECUTOR,
+    lambda: crop_model,
+    workers=INFERENCE_WORKERS,
+    start_method=INFERENCE_START_METHOD
+)
+
+# Opt-in micro-batching of concurrent /api/predict calls
+BATCHING_ENABLED = os.getenv("PREDICT_BATCHING", "false").lower() == "true"
+BATCH_WINDOW_MS = float(os.getenv("PREDICT_BATCH_WINDOW_MS", "2"))
+MAX_BATCH_SIZE = int(os.getenv("PREDICT_MAX_BATCH_SIZE", "64"))
+
+prediction_scheduler = MicroBatchScheduler(
+    inference_executor.predict_batch,
+    window_ms=BATCH_WINDOW_MS,
+    max_batch_size=MAX_BATCH_SIZE
+) if BATCHING_ENABLED else None
+
+# Rows scored per model call by /api/predict/stream
+STREAM_CHUNK_SIZE = int(os.getenv("PREDICT_STREAM_CHUNK_SIZE", "256"))
+
+# Opt-in cache of predictions keyed on quantized input features
+CACHE_ENABLED = os.getenv("PREDICTION_CACHE", "false").lower() == "true"
+
+prediction_cache = PredictionCache(
+    precisions=parse_precisions(os.getenv("PREDICTION_CACHE_PRECISION", "")),
+    max_entries=int(os.getenv("PREDICTION_CACHE_MAX_ENTRIES", "10000")),
+    ttl_seconds=float(os.getenv("PREDICTION_CACHE_TTL_SECONDS", "300")),
+    watched_files=[crop_model.model_path, crop_model.encoder_path, crop_model.compiled_path, crop_model.compact_path]
+) if CACHE_ENABLED else None
+
+async def _run_inference(features_list: List[Dict[str, Any]]):
+    """Score rows, coalescing single rows with concurrent requests if enabled"""
+    if prediction_scheduler is not None and len(features_list) == 1:
+        return [await prediction_scheduler.submit(features_list[0])]
+    return await inference_executor.predict_batch(features_list)
+
+async def _predict_rows(features_list: List[Dict[str, Any]], explain: bool = False):
+    """Top 3 predictions per row, served from the prediction cache where possible"""
+    if explain:
+        # Explanations bypass the cache and the micro-batching scheduler
+        return await inference_executor.predict_batch(features_list, explain=True)
+    if prediction_cache is None:
+        return await _run_inference(features_list)
+    
+    results = [prediction_cache.get(features) for features in features_list]
+    misses = [i for i, result in enumerate(results) if result is None]
+    # A model swap during inference invalidates the cache; these results must not refill it
+    generation = prediction_cache.generation
+    
+    if misses:
+        fresh = await _run_inference([features_list[i] for i in misses])
+        if fresh is None:
+            return None
+        for i, result in zip(misses, fresh):
+            results[i] = result
+            if result is not None:
+                prediction_cache.put(features_list[i], result, generation)
+    
+    return results
 
 async def get_ml_model():
-    """Dependency to get ML model instance"""
-    global crop_model
+    """Dependency to get ML model instance; 503 until the model is warmed up"""
+    if not model_state.ready:
+        if model_state.training:
+            detail = "Model is being trained, please retry shortly"
+        elif model_state.error:
+            detail = f"ML model unavailable: {model_state.error}"
+        else:
+            detail = "Model is still loading, please retry shortly"
+        raise HTTPException(status_code=503, detail=detail, headers={"Retry-After": "5"})
+    
+    return crop_model
+
+async def warm_up_model():
+    """
+    Load the model and run a warm-up inference before serving traffic
     
-    # Load model if not already loaded
-    if crop_model.model is None:
-        success = crop_model.load_model()
+    If the model files are missing, training starts in the background and
+    prediction endpoints answer 503 until it has finished.
+    """
+    global _training_task
+    started = time.perf_counter()
+    
+    loaded = crop_model.is_loaded() or await asyncio.to_thread(crop_model.load_model)
+    if loaded:
+        await _finish_warm_up(started)
+        return
+    
+    logger.warning("Model not found, training new model in the background...")
+    model_state.training = True
+    _training_task = asyncio.create_task(_train_in_background(started))
+
+async def _train_in_background(started: float):
+    try:
+        success = await asyncio.to_thread(crop_model.train_model)
         if not success:
-            # Try to train model if not found
-            logger.info("Model not found, training new model...")
-            success = crop_model.train_model()
-            if not success:
-                raise HTTPException(
-                    status_code=500, 
-                    detail="Failed to load or train ML model"
-                )
+            model_state.error = "Failed to load or train ML model"
+            logger.error(model_state.error)
+            return
+        await _finish_warm_up(started)
+    except Exception as e:
+        model_state.error = str(e)
+        logger.error(f"Background model training failed: {e}")
+    finally:
+        model_state.training = False
+
+async def _finish_warm_up(started: float):
+    loaded_at = time.perf_counter()
     
-    return crop_model
+    # First inference pays for lazy initialisation in sklearn, NumPy and the executor
+    results = await inference_executor.predict_batch([WARM_UP_FEATURES])
+    if not results:
+        model_state.error = "Warm-up inference failed"
+        logger.error(model_state.error)
+        return
+    
+    finished = time.perf_counter()
+    model_state.cold_start_ms = round((finished - started) * 1000, 1)
+    model_state.error = None
+    model_state.ready = True
+    logger.info(
+        f"Model ready: load {(loaded_at - started) * 1000:.0f} ms, "
+        f"warm-up {(finished - loaded_at) * 1000:.0f} ms, "
+        f"cold start {model_state.cold_start_ms:.0f} ms"
+    )
 
-@router.post("/predict", response_model=CropPredictionResponse)
+@router.post("/predict", response_model=CropPredictionResponse, response_model_exclude_none=True)
+@timed_handler
 async def predict_crop(
     request: CropPredictionRequest,
     farm_id: str = None,
+    explain: bool = False,
     model: CropRecommendationModel = Depends(get_ml_model)
 ):
     """
@@ -57,13 +218,16 @@ async def predict_crop(
     - **ph**: pH value of soil
     - **rainfall**: Annual rainfall (mm)
     - **farm_id**: Optional farm identifier for storing recommendation
+    - **explain**: Add per-feature contributions to each recommended crop
     """
     try:
         # Convert request to dictionary
         features = request.dict()
         
         # Get predictions from ML model
-        predictions = model.predict_crop(features)
+        with stage("inference"):
+            results = await _predict_rows([features], explain)
+        predictions = results[0] if results else None
         
         if not predictions:
             raise HTTPException(
@@ -76,18 +240,16 @@ async def predict_crop(
             CropRecommendation(
                 crop=pred["crop"],
                 score=pred["score"], 
-                reason=pred["reason"]
+                reason=pred["reason"],
+                contributions=pred.get("contributions")
             )
             for pred in predictions
         ]
         
         # Additional analysis
-        analysis = {
-            "soil_health": _assess_soil_health(features),
-            "weather_suitability": _assess_weather_suitability(features),
-            "risk_level": _assess_risk_level(features),
-            "recommendations_count": len(recommendations)
-        }
+        with stage("analysis"):
+            analysis = analysis_engine.assess(features)
+            analysis["recommendations_count"] = len(recommendations)
         
         # Store recommendation in database if farm_id provided
         if farm_id:
@@ -99,7 +261,8 @@ async def predict_crop(
                     created_at=datetime.utcnow()
                 ).dict()
                 
-                recommendation_id = await database_ops.create_recommendation(recommendation_data)
+                with stage("storage"):
+                    recommendation_id = await database_ops.create_recommendation(recommendation_data)
                 analysis["recommendation_id"] = recommendation_id
                 
             except Exception as e:
@@ -119,32 +282,309 @@ async def predict_crop(
             detail=f"Internal server error: {str(e)}"
         )
 
+@router.post("/predict/batch", response_model=CropBatchPredictionResponse, response_model_exclude_none=True)
+@timed_handler
+async def predict_crops_batch(
+    request: CropBatchPredictionRequest,
+    explain: bool = False,
+    model: CropRecommendationModel = Depends(get_ml_model)
+):
+    """
+    Predict the best crops for many soil samples in a single call
+    
+    - **rows**: List of soil and weather samples, each with the same fields as `/api/predict`
+    - **explain**: Add per-feature contributions to each recommended crop
+    
+    All rows are scored with one model call; results are returned in input order.
+    """
+    try:
+        features_list = [row.dict() for row in request.rows]
+        
+        # One vectorized inference over the whole batch
+        with stage("inference"):
+            predictions = await _predict_rows(features_list, explain)
+        
+        if predictions is None:
+            raise HTTPException(
+                status_code=500,
+                detail="Failed to generate crop recommendations"
+            )
+        
+        # Vectorized analysis over the whole batch
+        with stage("analysis"):
+            analyses = analysis_engine.analyze(model.to_feature_array(features_list))
+        
+        results = []
+        for row_predictions, analysis in zip(predictions, analyses):
+            recommendations = [
+                CropRecommendation(
+                    crop=pred["crop"],
+                    score=pred["score"],
+                    reason=pred["reason"],
+                    contributions=pred.get("contributions")
+                )
+                for pred in row_predictions
+            ]
+            analysis["recommendations_count"] = len(recommendations)
+            results.append(CropPredictionResponse(
+                recommendations=recommendations,
+                analysis=analysis
+            ))
+        
+        return CropBatchPredictionResponse(results=results, count=len(results))
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in batch crop prediction: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+def _parse_ndjson_line(line: bytes):
+    """Validated row of one NDJSON line, or the error message for it"""
+    try:
+        row = json.loads(line)
+    except ValueError as e:
+        return f"Invalid JSON: {e}"
+    if not isinstance(row, dict):
+        return "Expected a JSON object"
+    try:
+        return CropPredictionRequest(**row).dict()
+    except ValidationError as e:
+        return "; ".join(
+            f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors()
+        )
+
+async def _ndjson_lines(stream):
+    """(line number, parsed row or error message) for every non-empty line of an NDJSON body, as it arrives"""
+    tail = b""
+    line_number = 0
+    async for data in stream:
+        lines = (tail + data).split(b"\n")
+        # The last piece may be the start of a line that continues in the next read
+        tail = lines.pop()
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield line_number, _parse_ndjson_line(line.strip())
+    if tail.strip():
+        yield line_number + 1, _parse_ndjson_line(tail.strip())
+
+class _DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body is produced while the request body is still read
+
+    StreamingResponse listens for disconnects by reading from `receive`,
+    which would take request body messages away from `request.stream()`.
+    A disconnect still ends the stream, as `request.stream()` raises on it.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+
+async def _score_stream_chunk(chunk, model, explain):
+    """NDJSON text for one chunk of (line number, row or error) entries, in input order"""
+    rows = [(line, features) for line, features in chunk if isinstance(features, dict)]
+    predictions = analyses = None
+    if rows:
+        features_list = [features for _, features in rows]
+        try:
+            with stage("inference"):
+                predictions = await _predict_rows(features_list, explain)
+            if predictions is not None:
+                with stage("analysis"):
+                    analyses = analysis_engine.analyze(model.to_feature_array(features_list))
+        except Exception as e:
+            # The response has started: report the failure on this chunk's lines
+            logger.error(f"Error in streaming crop prediction: {e}")
+            predictions = None
+    
+    results = {}
+    for index, (line, _) in enumerate(rows):
+        if predictions is None or predictions[index] is None:
+            results[line] = {"line": line, "error": "Failed to generate crop recommendations"}
+            continue
+        analysis = analyses[index]
+        analysis["recommendations_count"] = len(predictions[index])
+        results[line] = {"line": line, "recommendations": predictions[index], "analysis": analysis}
+    
+    return "".join(
+        json.dumps(results[line] if line in results else {"line": line, "error": entry}) + "\n"
+        for line, entry in chunk
+    )
+
+@router.post("/predict/stream")
+@timed_handler
+async def predict_crops_stream(
+    request: Request,
+    chunk_size: int = Query(STREAM_CHUNK_SIZE, ge=1, le=10000),
+    explain: bool = False,
+    model: CropRecommendationModel = Depends(get_ml_model)
+):
+    """
+    Score NDJSON rows and stream NDJSON results back as each chunk finishes
+    
+    - **body**: One JSON object per line, with the same fields as `/api/predict`
+    - **chunk_size**: Rows scored per model call
+    - **explain**: Add per-feature contributions to each recommended crop
+    
+    Every output line has the input `line` number and either `recommendations`
+    and `analysis`, or an `error` for that row only. Lines come back in input
+    order. The body is read as it arrives and each chunk is scored as soon as
+    it is complete; the next chunk is read only after the previous one was sent,
+    so neither a large upload nor a slow client is buffered on the server.
+    """
+    async def results():
+        chunk = []
+        async for entry in _ndjson_lines(request.stream()):
+            chunk.append(entry)
+            if len(chunk) >= chunk_size:
+                yield await _score_stream_chunk(chunk, model, explain)
+                chunk = []
+        if chunk:
+            yield await _score_stream_chunk(chunk, model, explain)
+    
+    return _DuplexStreamingResponse(results(), media_type="application/x-ndjson")
+
+@router.get("/predict/scheduler/stats")
+async def prediction_scheduler_stats():
+    """Queue depth and batch size metrics of the micro-batching scheduler"""
+    if prediction_scheduler is None:
+        return {"enabled": False}
+    
+    return {"enabled": True, **prediction_scheduler.stats()}
+
+@router.get("/predict/cache/stats")
+async def prediction_cache_stats():
+    """Hit, miss and eviction counters of the prediction cache"""
+    if prediction_cache is None:
+        return {"enabled": False}
+    
+    return {"enabled": True, **prediction_cache.stats()}
+
+@router.get("/predict/executor/stats")
+async def prediction_executor_stats():
+    """Inference executor backend and pool size"""
+    return {
+        "backend": inference_executor.name,
+        "workers": inference_executor.workers
+    }
+
+async def activate_model_version(version: str) -> Dict[str, Any]:
+    """
+    Load a registry version off the event loop, warm it up and swap it in
+    
+    The global model reference is only replaced once the new model is fully
+    loaded and has served a warm-up prediction. Requests that already hold
+    the previous model finish on it.
+    
+    Raises:
+        KeyError: Unknown version
+        RuntimeError: The version could not be loaded or warmed up
+    """
+    global crop_model
+    
+    async with _swap_lock:
+        new_model = model_registry.model_for(version)
+        started = time.perf_counter()
+        
+        if not await asyncio.to_thread(new_model.load_model):
+            raise RuntimeError(f"Failed to load model version {version}")
+        if not await asyncio.to_thread(new_model.predict_crops_batch, [WARM_UP_FEATURES]):
+            raise RuntimeError(f"Warm-up prediction failed for model version {version}")
+        
+        previous_version = crop_model.version
+        crop_model = new_model
+        await inference_executor.reload()
+        
+        if prediction_cache is not None:
+            prediction_cache.watch([new_model.model_path, new_model.encoder_path, new_model.compiled_path, new_model.compact_path])
+        if model_registry.active_version() != version:
+            model_registry.set_active(version)
+        
+        model_state.ready = True
+        model_state.error = None
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(f"Swapped model {previous_version} -> {version} in {elapsed_ms:.0f} ms")
+        
+        return {
+            "previous_version": previous_version,
+            "version": version,
+            "swap_ms": elapsed_ms
+        }
+
+async def _watch_registry():
+    """Swap in the registry's active version whenever the ACTIVE file changes"""
+    signature = model_registry.active_signature()
+    while True:
+        await asyncio.sleep(REGISTRY_WATCH_SECONDS)
+        current = model_registry.active_signature()
+        if current == signature:
+            continue
+        signature = current
+        
+        version = model_registry.active_version()
+        if version and version != crop_model.version:
+            try:
+                await activate_model_version(version)
+            except Exception as e:
+                logger.error(f"Failed to activate model version {version}: {e}")
+
+async def startup_prediction_services():
+    """Start background prediction workers and warm up the model"""
+    global _registry_watch_task
+    await inference_executor.start()
+    await warm_up_model()
+    
+    if REGISTRY_WATCH_SECONDS > 0:
+        _registry_watch_task = asyncio.create_task(_watch_registry())
+
+async def shutdown_prediction_services():
+    """Stop background prediction workers"""
+    for task in (_training_task, _registry_watch_task):
+        if task is not None and not task.done():
+            task.cancel()
+    if prediction_scheduler is not None:
+        await prediction_scheduler.close()
+    await inference_executor.shutdown()
+
+@router.get("/predict/ready")
+async def prediction_ready():
+    """Readiness probe: 200 once the model is loaded and warmed up, 503 before"""
+    state = {
+        "ready": model_state.ready,
+        "training": model_state.training,
+        "error": model_state.error,
+        "cold_start_ms": model_state.cold_start_ms
+    }
+    return JSONResponse(status_code=200 if model_state.ready else 503, content=state)
+
 @router.get("/predict/health")
 async def prediction_health():
     """Health check endpoint for prediction service"""
     try:
         model = await get_ml_model()
         
-        # Test prediction with sample data
-        test_features = {
-            'N': 90,
-            'P': 42, 
-            'K': 43,
-            'temperature': 25,
-            'humidity': 80,
-            'ph': 6.5,
-            'rainfall': 200
-        }
-        
-        predictions = model.predict_crop(test_features)
+        results = await inference_executor.predict_batch([WARM_UP_FEATURES])
+        predictions = results[0] if results else None
         
         return {
             "status": "healthy",
-            "model_loaded": model.model is not None,
+            "model_loaded": model.is_loaded(),
+            "model_version": model.version,
             "test_prediction_count": len(predictions) if predictions else 0,
+            "cold_start_ms": model_state.cold_start_ms,
             "timestamp": datetime.utcnow().isoformat()
         }
         
+    except HTTPException as e:
+        return {
+            "status": "training" if model_state.training else "unhealthy",
+            "error": e.detail,
+            "timestamp": datetime.utcnow().isoformat()
+        }
     except Exception as e:
         logger.error(f"Health check failed: {e}")
         return {
@@ -155,99 +595,12 @@ async def prediction_health():
 
 def _assess_soil_health(features: Dict[str, Any]) -> str:
     """Assess overall soil health based on NPK and pH values"""
-    n, p, k, ph = features['N'], features['P'], features['K'], features['ph']
-    
-    # Define optimal ranges
-    optimal_ranges = {
-        'N': (40, 120),
-        'P': (20, 60), 
-        'K': (20, 60),
-        'ph': (6.0, 7.5)
-    }
-    
-    score = 0
-    total_factors = 4
-    
-    # Check each factor
-    if optimal_ranges['N'][0] <= n <= optimal_ranges['N'][1]:
-        score += 1
-    if optimal_ranges['P'][0] <= p <= optimal_ranges['P'][1]:
-        score += 1
-    if optimal_ranges['K'][0] <= k <= optimal_ranges['K'][1]:
-        score += 1
-    if optimal_ranges['ph'][0] <= ph <= optimal_ranges['ph'][1]:
-        score += 1
-    
-    percentage = (score / total_factors) * 100
-    
-    if percentage >= 80:
-        return "Excellent"
-    elif percentage >= 60:
-        return "Good" 
-    elif percentage >= 40:
-        return "Fair"
-    else:
-        return "Poor"
+    return analysis_engine.assess(features)["soil_health"]
 
 def _assess_weather_suitability(features: Dict[str, Any]) -> str:
     """Assess weather suitability for crop growth"""
-    temp, humidity, rainfall = features['temperature'], features['humidity'], features['rainfall']
-    
-    score = 0
-    total_factors = 3
-    
-    # Temperature assessment (20-30°C is generally good for most crops)
-    if 20 <= temp <= 30:
-        score += 1
-    elif 15 <= temp <= 35:
-        score += 0.5
-    
-    # Humidity assessment (50-80% is generally good)
-    if 50 <= humidity <= 80:
-        score += 1
-    elif 40 <= humidity <= 90:
-        score += 0.5
-    
-    # Rainfall assessment (100-300mm is generally good)
-    if 100 <= rainfall <= 300:
-        score += 1
-    elif 50 <= rainfall <= 400:
-        score += 0.5
-    
-    percentage = (score / total_factors) * 100
-    
-    if percentage >= 80:
-        return "Excellent"
-    elif percentage >= 60:
-        return "Good"
-    elif percentage >= 40:
-        return "Moderate"
-    else:
-        return "Poor"
+    return analysis_engine.assess(features)["weather_suitability"]
 
 def _assess_risk_level(features: Dict[str, Any]) -> str:
     """Assess overall risk level for crop cultivation"""
-    soil_health = _assess_soil_health(features)
-    weather_suitability = _assess_weather_suitability(features)
-    
-    # Risk matrix
-    risk_matrix = {
-        ("Excellent", "Excellent"): "Very Low",
-        ("Excellent", "Good"): "Low",
-        ("Excellent", "Moderate"): "Low", 
-        ("Excellent", "Poor"): "Medium",
-        ("Good", "Excellent"): "Low",
-        ("Good", "Good"): "Low",
-        ("Good", "Moderate"): "Medium",
-        ("Good", "Poor"): "Medium",
-        ("Fair", "Excellent"): "Medium",
-        ("Fair", "Good"): "Medium",
-        ("Fair", "Moderate"): "Medium",
-        ("Fair", "Poor"): "High",
-        ("Poor", "Excellent"): "Medium",
-        ("Poor", "Good"): "High",
-        ("Poor", "Moderate"): "High",
-        ("Poor", "Poor"): "Very High"
-    }
-    
-    return risk_matrix.get((soil_health, weather_suitability), "Medium")
+    return analysis_engine.assess(features)["risk_level"]
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Measure import time and cold start of the serving path in fresh interpreters
+
+Each measurement runs in a new Python process, so nothing is cached in
+sys.modules. Reported per scenario (median over --repeat runs): import
+seconds, model load seconds, first prediction seconds, peak RSS and whether
+pandas / scikit-learn ended up imported.
+
+Scenarios:
+    import:<module>  - only import the module (app.ml.inference, app.ml.model, app.main)
+    pickle           - InferenceModel loading trained_model.joblib (imports scikit-learn)
+    mmap             - InferenceModel memory-mapping compiled_model.joblib
+    compact          - InferenceModel memory-mapping compact_model.joblib (python -m app.ml.compact first)
+
+Usage (from the backend directory):
+    python benchmarks/bench_cold_start.py --repeat 5 --output /tmp/cold_start.json
+    python benchmarks/bench_cold_start.py --compare /tmp/cold_start.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+IMPORT_MODULES = ("app.ml.inference", "app.ml.model", "app.main")
+
+# Runs in the child process; prints one JSON line
+CHILD = """
+import json, resource, sys, time
+started = time.perf_counter()
+import {module}
+imported = time.perf_counter()
+result = {{"import_s": imported - started}}
+if {load}:
+    from app.ml.inference import InferenceModel
+    model = InferenceModel()
+    model.use_mmap = {use_mmap}
+    model.use_compact = {use_compact}
+    assert model.load_model()
+    loaded = time.perf_counter()
+    model.predict_crop({{'N': 90, 'P': 42, 'K': 43, 'temperature': 25, 'humidity': 80, 'ph': 6.5, 'rainfall': 200}})
+    result["load_s"] = loaded - imported
+    result["first_predict_s"] = time.perf_counter() - loaded
+result["total_s"] = time.perf_counter() - started
+result["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+result["pandas"] = "pandas" in sys.modules
+result["sklearn"] = "sklearn" in sys.modules
+print(json.dumps(result))
+"""
+
+def scenarios():
+    """(name, child script) for every scenario that can run with the artifacts on disk"""
+    runs = [
+        (f"import:{module}", CHILD.format(module=module, load=False, use_mmap=False, use_compact=False))
+        for module in IMPORT_MODULES
+    ]
+    runs.append(("pickle", CHILD.format(module="app.ml.inference", load=True, use_mmap=False, use_compact=False)))
+    runs.append(("mmap", CHILD.format(module="app.ml.inference", load=True, use_mmap=True, use_compact=False)))
+    if (BACKEND_DIR / "app" / "ml" / "compact_model.joblib").exists():
+        runs.append(("compact", CHILD.format(module="app.ml.inference", load=True, use_mmap=False, use_compact=True)))
+    return runs
+
+def run_child(script):
+    env = {**os.environ, "PYTHONPATH": str(BACKEND_DIR), "PYTHONWARNINGS": "ignore"}
+    output = subprocess.run(
+        [sys.executable, "-c", script], cwd=BACKEND_DIR, env=env,
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def measure(script, repeat):
+    """Median of every numeric field over `repeat` fresh processes"""
+    samples = [run_child(script) for _ in range(repeat)]
+    result = {}
+    for key, value in samples[0].items():
+        if isinstance(value, bool):
+            result[key] = value
+        else:
+            result[key] = round(statistics.median(sample[key] for sample in samples), 4)
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh processes per scenario")
+    parser.add_argument("--output", help="Save the results as JSON")
+    parser.add_argument("--compare", help="Earlier --output file to compare against")
+    args = parser.parse_args()
+
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else {}
+    results = {}
+
+    print(f"{'scenario':>24} {'import s':>9} {'load s':>8} {'1st pred s':>10} {'total s':>8} {'RSS MB':>8}  imports")
+    for name, script in scenarios():
+        result = results[name] = measure(script, args.repeat)
+        imports = ", ".join(lib for lib in ("pandas", "sklearn") if result[lib]) or "-"
+        line = (f"{name:>24} {result['import_s']:>9.3f} {result.get('load_s', 0):>8.3f} "
+                f"{result.get('first_predict_s', 0):>10.3f} {result['total_s']:>8.3f} {result['peak_rss_mb']:>8.1f}  {imports}")
+        if name in baseline:
+            line += (f"  (total {result['total_s'] / baseline[name]['total_s']:.2f}x, "
+                     f"RSS {result['peak_rss_mb'] / baseline[name]['peak_rss_mb']:.2f}x)")
+        print(line)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+        print(f"Results saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
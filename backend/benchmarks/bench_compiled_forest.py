@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark the compiled array-based forest against sklearn's predict_proba
+
+Usage (from the backend directory):
+    python benchmarks/bench_compiled_forest.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.ml.model import CropRecommendationModel
+from app.ml.compiled_forest import CompiledForest
+
+# Bounds enforced by CropPredictionRequest
+FEATURE_LOW = np.array([0, 0, 0, -10, 0, 3, 0])
+FEATURE_HIGH = np.array([300, 150, 100, 50, 100, 10, 500])
+
+BATCH_SIZES = [1, 32, 1024, 10000]
+
+def random_inputs(n_rows, seed=0):
+    """Uniform random rows within the validated feature ranges"""
+    rng = np.random.default_rng(seed)
+    return rng.uniform(FEATURE_LOW, FEATURE_HIGH, size=(n_rows, len(FEATURE_LOW)))
+
+def time_call(func, X, min_time=0.5):
+    """Median seconds per call, repeating until min_time has elapsed"""
+    timings = []
+    deadline = time.perf_counter() + min_time
+    while time.perf_counter() < deadline or len(timings) < 5:
+        start = time.perf_counter()
+        func(X)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+def main():
+    model = CropRecommendationModel(engine="sklearn")
+    if not model.load_model():
+        sys.exit(1)
+
+    start = time.perf_counter()
+    compiled = CompiledForest.from_sklearn(model.model)
+    compile_time = time.perf_counter() - start
+
+    X = random_inputs(max(BATCH_SIZES))
+    max_diff = np.abs(compiled.predict_proba(X) - model.model.predict_proba(X)).max()
+
+    print(f"Trees: {compiled.n_trees}, nodes: {len(compiled.feature)}, max depth: {compiled.max_depth}")
+    print(f"Compile time: {compile_time * 1000:.1f} ms")
+    print(f"Max |probability difference| vs sklearn: {max_diff:.2e}\n")
+
+    print(f"{'rows':>8} {'sklearn ms':>12} {'compiled ms':>12} {'speedup':>9}")
+    for n_rows in BATCH_SIZES:
+        sklearn_time = time_call(model.model.predict_proba, X[:n_rows])
+        compiled_time = time_call(compiled.predict_proba, X[:n_rows])
+        print(f"{n_rows:>8} {sklearn_time * 1000:>12.3f} {compiled_time * 1000:>12.3f} "
+              f"{sklearn_time / compiled_time:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Compare the model types CropRecommendationModel can train
+
+For each model type reports training time, accuracy on the standard
+crop_recommendation.csv split, serialized size and predict_proba
+throughput at several batch sizes. Nothing is written to disk.
+
+Usage (from the backend directory):
+    python benchmarks/bench_engines.py
+    python benchmarks/bench_engines.py --model-types random_forest,xgboost
+"""
+
+import argparse
+import io
+import sys
+import time
+from pathlib import Path
+
+import joblib
+from sklearn.metrics import accuracy_score
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.ml.model import CropRecommendationModel, DEFAULT_DATASET, MODEL_TYPE_PARAMS
+from bench_compiled_forest import random_inputs, time_call
+
+BATCH_SIZES = [1, 32, 1024, 10000]
+
+def bench_model_type(model_type, X_train, X_test, y_train, y_test):
+    model = CropRecommendationModel(engine="sklearn", model_type=model_type)
+    estimator = model.build_estimator()
+
+    start = time.perf_counter()
+    estimator.fit(X_train, y_train)
+    training_seconds = time.perf_counter() - start
+
+    accuracy = accuracy_score(y_test, estimator.predict(X_test))
+    buffer = io.BytesIO()
+    joblib.dump(estimator, buffer)
+
+    X = random_inputs(max(BATCH_SIZES))
+    throughput = {
+        n_rows: n_rows / time_call(estimator.predict_proba, X[:n_rows])
+        for n_rows in BATCH_SIZES
+    }
+    return training_seconds, accuracy, buffer.getbuffer().nbytes, throughput
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-types", default=",".join(MODEL_TYPE_PARAMS))
+    args = parser.parse_args()
+
+    base = CropRecommendationModel()
+    df = base.load_data(DEFAULT_DATASET)
+    if df is None:
+        sys.exit(1)
+    X, y_encoded, _ = base.preprocess_data(df)
+    X_train, X_test, y_train, y_test = base.split_data(X, y_encoded)
+
+    header = " ".join(f"{f'{n} rows/s':>14}" for n in BATCH_SIZES)
+    print(f"{'model type':>24} {'train s':>8} {'accuracy':>9} {'size KB':>8} {header}")
+    for model_type in args.model_types.split(","):
+        try:
+            training_seconds, accuracy, size, throughput = bench_model_type(
+                model_type, X_train, X_test, y_train, y_test
+            )
+        except ImportError as e:
+            print(f"{model_type:>24} skipped: {e}")
+            continue
+        rates = " ".join(f"{throughput[n]:>14,.0f}" for n in BATCH_SIZES)
+        print(f"{model_type:>24} {training_seconds:>8.2f} {accuracy:>9.4f} {size / 1024:>8.0f} {rates}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Measure per-worker memory for the different ways of loading the model
+
+Forks N worker processes the way gunicorn does and reports, per worker,
+RSS, PSS (proportional set size, shared pages divided among sharers) and
+USS (private memory) from /proc/<pid>/smaps_rollup. Linux only.
+
+Modes:
+    none     - workers import the app stack but load no model (baseline)
+    pickle   - every worker joblib.load()s trained_model.joblib
+    preload  - the master loads the model once before forking
+    mmap     - every worker memory-maps compiled_model.joblib
+
+Usage (from the backend directory):
+    python benchmarks/bench_worker_memory.py --workers 4
+"""
+
+import argparse
+import gc
+import multiprocessing
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.ml.model import CropRecommendationModel
+
+SAMPLE = {'N': 90, 'P': 42, 'K': 43, 'temperature': 25, 'humidity': 80, 'ph': 6.5, 'rainfall': 200}
+
+def memory_kb(pid="self"):
+    """Rss, Pss and USS (Private_Clean + Private_Dirty) in kB"""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                fields[parts[0][:-1]] = int(parts[1])
+    return {
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        "uss": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    }
+
+def worker(mode, model, ready, measure, results):
+    if mode == "pickle":
+        model = CropRecommendationModel(engine="sklearn")
+        model.use_mmap = False
+        model.load_model()
+    elif mode == "mmap":
+        model = CropRecommendationModel()
+        model.use_mmap = True
+        model.load_model()
+
+    # Serve a few predictions so lazily touched pages are resident
+    if model is not None:
+        for _ in range(20):
+            model.predict_crop(SAMPLE)
+
+    ready.wait()
+    measure.wait()
+    results.put(memory_kb())
+
+def run_mode(mode, n_workers):
+    context = multiprocessing.get_context("fork")
+    model = None
+    if mode == "preload":
+        model = CropRecommendationModel(engine="sklearn")
+        model.use_mmap = False
+        model.load_model()
+        gc.freeze()
+
+    ready = context.Barrier(n_workers + 1)
+    measure = context.Barrier(n_workers + 1)
+    results = context.Queue()
+    processes = [
+        context.Process(target=worker, args=(mode, model, ready, measure, results))
+        for _ in range(n_workers)
+    ]
+    for process in processes:
+        process.start()
+
+    # All workers have loaded their model; measure them at the same time
+    ready.wait()
+    measure.wait()
+    samples = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    if mode == "preload":
+        gc.unfreeze()
+
+    return {key: sum(sample[key] for sample in samples) / len(samples) for key in ("rss", "pss", "uss")}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    # Import the prediction stack up front so every mode shares it equally
+    import sklearn.ensemble  # noqa: F401
+
+    print(f"Workers: {args.workers}")
+    print(f"{'mode':>8} {'RSS MB':>8} {'PSS MB':>8} {'USS MB':>8}")
+    for mode in ("none", "pickle", "preload", "mmap"):
+        usage = run_mode(mode, args.workers)
+        print(f"{mode:>8} {usage['rss'] / 1024:>8.1f} {usage['pss'] / 1024:>8.1f} {usage['uss'] / 1024:>8.1f}")
+
+if __name__ == "__main__":
+    main()
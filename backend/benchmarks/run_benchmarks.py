@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the prediction hot path
+
+Times each component on its own, in process (no server, no MongoDB):
+request validation, predict_crop at several batch sizes, reason generation,
+the analysis helpers and the chatbot matching/formatting functions.
+
+Results are saved as JSON so runs can be compared across commits. With
+--compare, every benchmark that got slower than the threshold is reported
+as a regression and the exit status is 1. Comparisons use the fastest
+sample by default (--metric), which is the least sensitive to other load
+on the machine.
+
+Usage (from the backend directory):
+    python benchmarks/run_benchmarks.py                        # run and save
+    python benchmarks/run_benchmarks.py --filter predict_crop
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/<baseline>.json --threshold 0.1
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.models import CropPredictionRequest
+from app.ml.analysis import analysis_engine
+from app.ml.model import CropRecommendationModel
+from app.routes import chatbot
+from app.routes.prediction import _assess_soil_health, _assess_weather_suitability, _assess_risk_level
+from bench_compiled_forest import random_inputs
+
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+
+SAMPLE = {'N': 90, 'P': 42, 'K': 43, 'temperature': 25, 'humidity': 80, 'ph': 6.5, 'rainfall': 200}
+
+CHAT_QUERIES = [
+    "how do I grow rice",
+    "tell me about organic farming",
+    "soil testing and ph",
+    "government subsidy schemes",
+    "drone technology for farms",
+    "best time to sell at the market",
+    "hello"
+]
+
+def time_benchmark(func, min_time=0.2, repeat=7):
+    """
+    Per-call timings of func()
+
+    The loop count is calibrated so each of the `repeat` samples runs for
+    about min_time / repeat seconds.
+    """
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / repeat:
+            break
+        loops *= 2 if elapsed == 0 else max(2, int(min_time / repeat / elapsed))
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        samples.append((time.perf_counter() - start) / loops)
+
+    return {
+        "median_us": statistics.median(samples) * 1e6,
+        "min_us": min(samples) * 1e6,
+        "stdev_us": statistics.stdev(samples) * 1e6 if repeat > 1 else 0.0,
+        "loops": loops,
+        "repeat": repeat
+    }
+
+def build_benchmarks(model):
+    """(name, zero-argument callable) for every benchmarked component"""
+    rows = [dict(zip(model.feature_names, map(float, row))) for row in random_inputs(1024)]
+    batch = model.to_feature_array(rows)
+
+    benchmarks = [
+        ("CropPredictionRequest.validate", lambda: CropPredictionRequest(**SAMPLE)),
+        ("predict_crop[1]", lambda: model.predict_crop(SAMPLE)),
+        ("predict_crop[32]", lambda: model.predict_crops_batch(rows[:32])),
+        ("predict_crop[1024]", lambda: model.predict_crops_batch(rows)),
+        ("predict_crop[1] explain", lambda: model.predict_crop(SAMPLE, explain=True)),
+        ("predict_crop[32] explain", lambda: model.predict_crops_batch(rows[:32], explain=True)),
+        ("predict_crop[1024] explain", lambda: model.predict_crops_batch(rows, explain=True)),
+        ("predict_proba_anytime[1]", lambda: model.path_forest.predict_proba_anytime(batch[:1])),
+        ("predict_proba_anytime[1024]", lambda: model.path_forest.predict_proba_anytime(batch)),
+        ("_generate_reason", lambda: model._generate_reason(SAMPLE)),
+        ("_assess_soil_health", lambda: _assess_soil_health(SAMPLE)),
+        ("_assess_weather_suitability", lambda: _assess_weather_suitability(SAMPLE)),
+        ("_assess_risk_level", lambda: _assess_risk_level(SAMPLE)),
+        ("analysis_engine.assess", lambda: analysis_engine.assess(SAMPLE)),
+        ("analysis_engine.analyze[1024]", lambda: analysis_engine.analyze(batch))
+    ]
+
+    for query in CHAT_QUERIES:
+        benchmarks.append((f"find_best_match[{query}]", lambda query=query: chatbot.find_best_match(query)))
+
+    knowledge = chatbot.AGRICULTURE_KNOWLEDGE
+    benchmarks += [
+        ("format_crop_response", lambda: chatbot.format_crop_response(knowledge["crops"]["rice"], "Rice")),
+        ("format_practice_response", lambda: chatbot.format_practice_response(
+            knowledge["farming_practices"]["organic_farming"], "Organic Farming")),
+        ("format_soil_response", lambda: chatbot.format_soil_response(knowledge["soil_management"])),
+        ("format_schemes_response", lambda: chatbot.format_schemes_response(knowledge["government_schemes"])),
+        ("format_technology_response", lambda: chatbot.format_technology_response(knowledge["modern_technologies"])),
+        ("format_market_response", lambda: chatbot.format_market_response(knowledge["market_intelligence"]))
+    ]
+    return benchmarks
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=Path(__file__).resolve().parent, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(current, baseline, threshold, metric="min_us"):
+    """
+    Regression report of current vs baseline timings
+
+    The minimum over samples is the default metric: it is the least
+    affected by other load on the machine.
+
+    Returns:
+        list: (name, baseline_us, current_us, relative change, status) per shared benchmark
+    """
+    report = []
+    for name, result in current["results"].items():
+        if name not in baseline["results"]:
+            continue
+        before = baseline["results"][name][metric]
+        change = result[metric] / before - 1 if before else 0.0
+        status = "REGRESSION" if change > threshold else "improved" if change < -threshold else "ok"
+        report.append((name, before, result[metric], change, status))
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", help="Only run benchmarks whose name contains this text")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds spent per benchmark")
+    parser.add_argument("--engine", choices=["sklearn", "compiled"], help="Inference engine (defaults to INFERENCE_ENGINE)")
+    parser.add_argument("--output", help="Result file (default benchmarks/results/<commit>-<time>.json)")
+    parser.add_argument("--compare", help="Baseline result file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative slowdown reported as a regression")
+    parser.add_argument("--metric", choices=["min_us", "median_us"], default="min_us",
+                        help="Timing compared against the baseline")
+    args = parser.parse_args()
+
+    model = CropRecommendationModel(engine=args.engine)
+    if not model.load_model():
+        sys.exit(1)
+
+    results = {}
+    print(f"{'benchmark':<48} {'median us':>12} {'min us':>12} {'loops':>8}")
+    for name, func in build_benchmarks(model):
+        if args.filter and args.filter not in name:
+            continue
+        func()
+        results[name] = time_benchmark(func, min_time=args.min_time)
+        print(f"{name:<48} {results[name]['median_us']:>12.2f} {results[name]['min_us']:>12.2f} "
+              f"{results[name]['loops']:>8}")
+
+    commit = git_commit()
+    run = {
+        "metadata": {
+            "commit": commit,
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "engine": model.engine,
+            "numpy": np.__version__
+        },
+        "results": results
+    }
+
+    output = Path(args.output) if args.output else \
+        RESULTS_DIR / f"{commit or 'unknown'}-{datetime.utcnow():%Y%m%dT%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(run, f, indent=2)
+    print(f"\nResults saved to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        report = compare(run, baseline, args.threshold, args.metric)
+        print(f"\nCompared with {args.compare} (commit {baseline['metadata'].get('commit')}), "
+              f"{args.metric}, threshold {args.threshold:.0%}:")
+        print(f"{'benchmark':<48} {'before us':>12} {'after us':>12} {'change':>8}  status")
+        for name, before, after, change, status in report:
+            print(f"{name:<48} {before:>12.2f} {after:>12.2f} {change:>+8.1%}  {status}")
+
+        regressions = [row for row in report if row[4] == "REGRESSION"]
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+            sys.exit(1)
+        print("\nNo regressions")
+
+if __name__ == "__main__":
+    main()
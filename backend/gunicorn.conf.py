@@ -0,0 +1,24 @@
+"""
+Gunicorn configuration for production deployments
+
+Usage (from the backend directory):
+    gunicorn app.main:app -c gunicorn.conf.py
+"""
+
+import gc
+import os
+
+bind = f"{os.getenv('API_HOST', '0.0.0.0')}:{os.getenv('API_PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+loglevel = os.getenv("LOG_LEVEL", "info").lower()
+
+# Import the app (and, with PRELOAD_MODEL=true, the model) once in the master
+# process before forking, so workers share those pages copy-on-write
+preload_app = os.getenv("PRELOAD_MODEL", "false").lower() == "true"
+
+def when_ready(server):
+    # Keep the workers' garbage collector from writing to (and so copying)
+    # pages that hold the preloaded objects
+    if preload_app:
+        gc.freeze()
@@ -0,0 +1,69 @@
+import os
+from pathlib import Path
+
+# No MongoDB in the test run: fail server selection fast instead of waiting 30 s
+os.environ.setdefault("DATABASE_URL", "mongodb://localhost:27017/?serverSelectionTimeoutMS=100")
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import LabelEncoder
+
+from app.ml.model import CropRecommendationModel
+
+DATASET = Path(__file__).parent.parent / 'data' / 'crop_recommendation.csv'
+
+FEATURE_NAMES = ['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall']
+
+# Valid input range of every feature (as validated by CropPredictionRequest)
+INPUT_BOUNDS = {
+    'N': (0, 300),
+    'P': (0, 150),
+    'K': (0, 100),
+    'temperature': (-10, 50),
+    'humidity': (0, 100),
+    'ph': (3, 10),
+    'rainfall': (0, 500)
+}
+
+SAMPLE_ROW = {'N': 90, 'P': 42, 'K': 43, 'temperature': 25, 'humidity': 80, 'ph': 6.5, 'rainfall': 200}
+
+@pytest.fixture(scope="session")
+def dataset():
+    return pd.read_csv(DATASET)
+
+@pytest.fixture(scope="session")
+def X(dataset):
+    return dataset[FEATURE_NAMES].to_numpy(dtype=float)
+
+@pytest.fixture(scope="session")
+def random_rows():
+    """Uniform random readings over the valid input ranges"""
+    low, high = np.array([INPUT_BOUNDS[name] for name in FEATURE_NAMES], dtype=float).T
+    return np.random.default_rng(0).uniform(low, high, (500, len(low)))
+
+@pytest.fixture(scope="session")
+def forest(dataset, X):
+    """Small random forest fitted on the bundled dataset"""
+    encoder = LabelEncoder().fit(dataset["label"])
+    estimator = RandomForestClassifier(n_estimators=60, max_depth=10, random_state=0)
+    estimator.fit(X, encoder.transform(dataset["label"]))
+    return estimator, encoder
+
+@pytest.fixture
+def model(forest, tmp_path):
+    """CropRecommendationModel serving the small forest, with artifacts under tmp_path"""
+    estimator, encoder = forest
+    crop_model = CropRecommendationModel(engine="sklearn", model_dir=tmp_path)
+    crop_model.model, crop_model.label_encoder = estimator, encoder
+    crop_model._prepare_inference()
+    return crop_model
+
+@pytest.fixture(scope="session")
+def client():
+    """The API with the bundled model loaded by the application lifespan"""
+    from app.main import app
+    with TestClient(app) as test_client:
+        yield test_client
@@ -0,0 +1,35 @@
+import numpy as np
+
+from app.ml.analysis import AnalysisEngine, DEFAULT_ANALYSIS_CONFIG
+
+from conftest import FEATURE_NAMES
+
+def boundary_rows():
+    """Readings on, just inside and just outside every configured range bound"""
+    rows = []
+    base = np.array([80, 40, 40, 25, 65, 6.5, 200], dtype=float)
+    for group in ("soil", "weather"):
+        for name, ranges in DEFAULT_ANALYSIS_CONFIG[group].items():
+            i = FEATURE_NAMES.index(name)
+            for bounds in ranges.values():
+                for bound in bounds:
+                    for offset in (-1e-6, 0.0, 1e-6):
+                        row = base.copy()
+                        row[i] = bound + offset
+                        rows.append(row)
+    return np.array(rows)
+
+def test_vectorized_analysis_matches_single_rows(X, random_rows):
+    engine = AnalysisEngine(DEFAULT_ANALYSIS_CONFIG)
+    rows = np.vstack([X, random_rows, boundary_rows()])
+
+    batch = engine.analyze(rows)
+    single = [engine.assess(dict(zip(FEATURE_NAMES, row))) for row in rows.tolist()]
+    assert batch == single
+
+def test_analysis_results_are_independent_copies(X):
+    engine = AnalysisEngine(DEFAULT_ANALYSIS_CONFIG)
+    first, second = engine.analyze(X[:2])
+    first["recommendations_count"] = 3
+    assert "recommendations_count" not in second
+    assert "recommendations_count" not in engine.assess(dict(zip(FEATURE_NAMES, X[0])))
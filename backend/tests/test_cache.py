@@ -0,0 +1,81 @@
+import pytest
+
+from app.ml.cache import DEFAULT_PRECISIONS, PredictionCache, parse_precisions
+
+from conftest import SAMPLE_ROW
+
+def test_readings_in_one_quantization_cell_share_a_key():
+    cache = PredictionCache()
+    close = {**SAMPLE_ROW, 'ph': SAMPLE_ROW['ph'] + 0.001, 'rainfall': SAMPLE_ROW['rainfall'] + 0.01}
+    apart = {**SAMPLE_ROW, 'ph': SAMPLE_ROW['ph'] + 0.02}
+
+    assert cache.key(close) == cache.key(SAMPLE_ROW)
+    assert cache.key(apart) != cache.key(SAMPLE_ROW)
+
+    cache.put(SAMPLE_ROW, "rice")
+    assert cache.get(close) == "rice"
+    assert cache.get(apart) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_coarser_precision_merges_cells():
+    precisions = parse_precisions("N=10, ph=0.5")
+    assert precisions == {**DEFAULT_PRECISIONS, 'N': 10.0, 'ph': 0.5}
+    cache = PredictionCache(precisions)
+    assert cache.key({**SAMPLE_ROW, 'N': 92, 'ph': 6.6}) == cache.key(SAMPLE_ROW)
+
+    with pytest.raises(ValueError):
+        parse_precisions("nitrogen=1")
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(max_entries=2)
+    rows = [{**SAMPLE_ROW, 'N': n} for n in (10, 20, 30)]
+    cache.put(rows[0], 0)
+    cache.put(rows[1], 1)
+    cache.get(rows[0])
+    cache.put(rows[2], 2)
+
+    assert cache.get(rows[1]) is None
+    assert cache.get(rows[0]) == 0 and cache.get(rows[2]) == 2
+    assert cache.evictions == 1
+
+def test_expired_entries_are_misses():
+    cache = PredictionCache(ttl_seconds=0)
+    cache.put(SAMPLE_ROW, "rice")
+    assert cache.get(SAMPLE_ROW) is None
+    assert cache.expirations == 1
+
+def test_model_file_change_clears_the_cache(tmp_path):
+    artifact = tmp_path / "trained_model.joblib"
+    artifact.write_bytes(b"v1")
+    cache = PredictionCache(watched_files=[artifact], check_interval=0)
+    cache.put(SAMPLE_ROW, "rice")
+    assert cache.get(SAMPLE_ROW) == "rice"
+
+    artifact.write_bytes(b"version 2")
+    assert cache.get(SAMPLE_ROW) is None
+    assert cache.invalidations == 1
+
+def test_watch_switches_files_and_starts_empty(tmp_path):
+    old, new = tmp_path / "old.joblib", tmp_path / "new.joblib"
+    old.write_bytes(b"old")
+    new.write_bytes(b"new")
+    cache = PredictionCache(watched_files=[old], check_interval=0)
+    cache.put(SAMPLE_ROW, "rice")
+
+    cache.watch([new])
+    assert cache.get(SAMPLE_ROW) is None
+    old.write_bytes(b"changed")
+    cache.put(SAMPLE_ROW, "maize")
+    assert cache.get(SAMPLE_ROW) == "maize"
+
+def test_results_from_before_an_invalidation_are_not_stored(tmp_path):
+    cache = PredictionCache()
+    generation = cache.generation
+    # e.g. the model was swapped while this prediction was being computed
+    cache.watch([tmp_path / "new.joblib"])
+    cache.put(SAMPLE_ROW, "old model", generation)
+
+    assert cache.get(SAMPLE_ROW) is None
+    assert cache.stale_puts == 1
+    cache.put(SAMPLE_ROW, "new model", cache.generation)
+    assert cache.get(SAMPLE_ROW) == "new model"
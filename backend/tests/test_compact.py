@@ -0,0 +1,42 @@
+import numpy as np
+
+from app.ml.compact import drift_report, export_compact
+from app.ml.compiled_forest import CompiledForest
+from app.ml.model import CropRecommendationModel
+
+def test_uint8_values_stay_close_to_the_full_forest(forest, dataset, X, random_rows):
+    estimator, encoder = forest
+    compact = CompiledForest.from_sklearn(estimator).quantize("float32", "uint8")
+    y = encoder.transform(dataset["label"])
+
+    report = drift_report(estimator, compact, X, y)
+    assert report["rows"] == len(X)
+    assert report["top1_agreement"] >= 0.99
+    # Each leaf value is rounded by at most half a step of 1/255
+    assert report["max_abs_proba_error"] <= 0.5 / 255 + 1e-9
+    assert report["accuracy"] >= report["reference_accuracy"] - 0.01
+
+    random_report = drift_report(estimator, compact, random_rows)
+    assert random_report["top1_agreement"] >= 0.98
+
+def test_float32_thresholds_keep_every_split(forest, random_rows):
+    compiled = CompiledForest.from_sklearn(forest[0])
+    compact = compiled.quantize("float32", "float16")
+    np.testing.assert_array_equal(compact.apply(random_rows), compiled.apply(random_rows))
+
+def test_identical_models_report_no_drift(forest, X):
+    estimator, _ = forest
+    report = drift_report(estimator, CompiledForest.from_sklearn(estimator), X)
+    assert report["top1_agreement"] == report["top3_order_agreement"] == 1.0
+    assert report["max_abs_proba_error"] < 1e-12
+
+def test_exported_artifact_serves_the_same_crops(model, X, tmp_path):
+    path = tmp_path / "compact_model.joblib"
+    export_compact(model, path=path)
+
+    compact_model = CropRecommendationModel(model_dir=tmp_path)
+    assert compact_model.load_compiled_model(path=path)
+    features = [dict(zip(model.feature_names, row)) for row in X[::30].tolist()]
+    expected = [[p["crop"] for p in row] for row in model.predict_crops_batch(features)]
+    served = [[p["crop"] for p in row] for row in compact_model.predict_crops_batch(features)]
+    assert np.mean([e[0] == s[0] for e, s in zip(expected, served)]) >= 0.97
@@ -0,0 +1,62 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from app.ml.compiled_forest import CompiledForest
+
+from conftest import FEATURE_NAMES
+
+def test_probabilities_match_sklearn(forest, X, random_rows):
+    estimator, _ = forest
+    compiled = CompiledForest.from_sklearn(estimator)
+    for rows in (X, random_rows, X[:1]):
+        np.testing.assert_allclose(compiled.predict_proba(rows), estimator.predict_proba(rows), atol=1e-12)
+
+def test_round_trip_through_arrays(forest, random_rows):
+    compiled = CompiledForest.from_sklearn(forest[0])
+    restored = CompiledForest.from_arrays(compiled.to_arrays())
+    np.testing.assert_array_equal(restored.predict_proba(random_rows), compiled.predict_proba(random_rows))
+
+def test_contributions_add_up_to_the_scores(forest, X, random_rows):
+    estimator, _ = forest
+    compiled = CompiledForest.from_sklearn(estimator)
+    rows = np.vstack([X, random_rows])
+
+    top, scores, contributions = compiled.predict_explained(rows, top_k=3, chunk_size=128)
+    proba = estimator.predict_proba(rows)
+    np.testing.assert_allclose(scores, np.take_along_axis(proba, top, axis=1), atol=1e-12)
+    np.testing.assert_allclose(compiled.bias[top] + contributions.sum(axis=-1), scores, atol=1e-9)
+    assert contributions.shape == (len(rows), 3, len(FEATURE_NAMES))
+
+def test_explained_predictions_match_plain_ones(model, X):
+    features = [dict(zip(FEATURE_NAMES, row)) for row in X[::50].tolist()]
+    plain = model.predict_crops_batch(features)
+    explained = model.predict_crops_batch(features, explain=True)
+
+    for plain_row, explained_row in zip(plain, explained):
+        assert [p["crop"] for p in plain_row] == [p["crop"] for p in explained_row]
+        assert all("contributions" not in p for p in plain_row)
+        assert all(set(p["contributions"]) == set(FEATURE_NAMES) for p in explained_row)
+
+def test_path_forest_is_built_on_first_use(model):
+    assert model._path_forest is None
+    path_forest = model.path_forest
+    assert path_forest is not None and model.path_forest is path_forest
+    assert path_forest._contributions is None
+
+def test_concurrent_first_calls_build_the_contribution_table_once(forest):
+    compiled = CompiledForest.from_sklearn(forest[0])
+    builds = []
+    node_proba = compiled._node_proba
+
+    def slow_node_proba():
+        builds.append(1)
+        time.sleep(0.05)
+        return node_proba()
+
+    compiled._node_proba = slow_node_proba
+    with ThreadPoolExecutor(4) as pool:
+        tables = list(pool.map(lambda _: compiled.contribution_table(), range(4)))
+    assert len(builds) == 1
+    assert all(table is tables[0] for table in tables)
@@ -0,0 +1,26 @@
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from app.ml.compression import out_of_bag_mask, select_trees
+
+def test_out_of_bag_mask_matches_sklearn(dataset, X):
+    y = dataset["label"].to_numpy()
+    forest = RandomForestClassifier(n_estimators=20, max_depth=6, oob_score=True, random_state=0).fit(X, y)
+    mask = out_of_bag_mask(forest, len(X))
+
+    votes = sum(tree.predict_proba(X) * rows[:, None] for tree, rows in zip(forest.estimators_, mask))
+    voted = mask.any(axis=0)
+    expected = forest.oob_decision_function_[voted]
+    np.testing.assert_allclose(votes[voted] / votes[voted].sum(axis=1, keepdims=True), expected)
+
+def test_rows_no_selected_tree_may_vote_on_count_as_errors():
+    # Tree 0 is right on every row but may only vote on row 0; tree 1 misses row 0
+    per_tree_proba = np.array([
+        [[1.0, 0.0], [0.0, 1.0], [0.0, 1.0]],
+        [[0.4, 0.6], [0.4, 0.6], [0.4, 0.6]]
+    ])
+    y = np.array([0, 1, 1])
+    mask = np.array([[True, False, False], [True, True, True]])
+
+    assert select_trees(per_tree_proba, y, 1.0, min_trees=1, max_trees=1) == [0]
+    assert select_trees(per_tree_proba, y, 1.0, min_trees=1, max_trees=1, mask=mask) == [1]
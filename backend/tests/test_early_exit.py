@@ -0,0 +1,66 @@
+import numpy as np
+
+from app.ml.compiled_forest import CompiledForest
+
+from conftest import FEATURE_NAMES
+
+def top_ranks(proba, ranks=3):
+    return np.argsort(proba, axis=1)[:, ::-1][:, :ranks]
+
+def test_settled_rows_keep_the_full_forest_ranking(forest, X, random_rows):
+    compiled = CompiledForest.from_sklearn(forest[0])
+    for rows in (X, random_rows):
+        full = compiled.predict_proba(rows)
+        for ranks in (1, 3):
+            proba, trees_used = compiled.predict_proba_anytime(rows, confidence=0.99, ranks=ranks, min_trees=10)
+
+            agreement = (top_ranks(proba, ranks) == top_ranks(full, ranks)).all(axis=1).mean()
+            assert agreement >= 0.99
+            assert trees_used.min() >= 10 and trees_used.max() <= compiled.n_trees
+            # Rows that never settled used every tree and got the exact probabilities
+            finished = trees_used == compiled.n_trees
+            np.testing.assert_allclose(proba[finished], full[finished], atol=1e-12)
+
+def test_confident_rows_stop_early(forest, X):
+    compiled = CompiledForest.from_sklearn(forest[0])
+    _, trees_used = compiled.predict_proba_anytime(X, ranks=1, min_trees=10)
+    assert trees_used.mean() < compiled.n_trees / 2
+
+def test_unreachable_margins_use_one_full_pass(forest, random_rows):
+    compiled = CompiledForest.from_sklearn(forest[0])
+    # No checkpoint of a 60-tree forest can separate four classes at 0.99
+    proba, trees_used = compiled.predict_proba_anytime(random_rows, ranks=3, min_trees=10)
+    assert (trees_used == compiled.n_trees).all()
+    np.testing.assert_allclose(proba, compiled.predict_proba(random_rows), atol=1e-12)
+
+def test_top_three_agreement_meets_the_confidence(model, X, random_rows):
+    rows = np.vstack([X, random_rows])
+    features = [dict(zip(FEATURE_NAMES, row)) for row in rows.tolist()]
+    expected = model.predict_crops_batch(features)
+
+    model.early_exit = True
+    model.early_exit_min_trees = 10
+    for ranks in (1, model.early_exit_ranks):
+        model.early_exit_ranks = ranks
+        predictions = model.predict_crops_batch(features)
+        agreement = np.mean([[p["crop"] for p in predicted][:ranks] == [e["crop"] for e in full][:ranks]
+                             for predicted, full in zip(predictions, expected)])
+        assert agreement >= model.early_exit_confidence
+
+def test_single_rows_use_early_exit(model, X):
+    features = dict(zip(FEATURE_NAMES, X[0].tolist()))
+    expected = model.predict_crop(features)
+
+    model.early_exit = True
+    model.early_exit_min_trees = 10
+    assert [p["crop"] for p in model.predict_crop(features)] == [p["crop"] for p in expected]
+    assert model._path_forest is not None
+
+def test_small_batches_below_the_minimum_skip_early_exit(model, X):
+    features = [dict(zip(FEATURE_NAMES, row)) for row in X[:8].tolist()]
+    expected = model.predict_crops_batch(features)
+
+    model.early_exit = True
+    model.early_exit_min_rows = 256
+    assert model.predict_crops_batch(features) == expected
+    assert model._path_forest is None
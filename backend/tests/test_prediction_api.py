@@ -0,0 +1,43 @@
+import json
+
+from conftest import SAMPLE_ROW
+
+ROWS = [
+    SAMPLE_ROW,
+    {'N': 20, 'P': 60, 'K': 20, 'temperature': 28, 'humidity': 45, 'ph': 7.2, 'rainfall': 70},
+    {'N': 0, 'P': 5, 'K': 5, 'temperature': -5, 'humidity': 10, 'ph': 3.5, 'rainfall': 10},
+    {'N': 140, 'P': 145, 'K': 100, 'temperature': 45, 'humidity': 99, 'ph': 9.5, 'rainfall': 300}
+]
+
+def test_batch_matches_single_predictions(client):
+    batch = client.post("/api/predict/batch", json={"rows": ROWS})
+    assert batch.status_code == 200
+    assert batch.json()["count"] == len(ROWS)
+
+    for row, result in zip(ROWS, batch.json()["results"]):
+        single = client.post("/api/predict", json=row)
+        assert single.status_code == 200
+        assert result == single.json()
+
+def test_contributions_only_with_explain(client):
+    plain = client.post("/api/predict", json=SAMPLE_ROW).json()
+    assert all("contributions" not in rec for rec in plain["recommendations"])
+
+    explained = client.post("/api/predict", params={"explain": True}, json=SAMPLE_ROW).json()
+    assert all(set(rec["contributions"]) == set(SAMPLE_ROW) for rec in explained["recommendations"])
+
+    batch = client.post("/api/predict/batch", json={"rows": [SAMPLE_ROW]}).json()
+    assert all("contributions" not in rec for rec in batch["results"][0]["recommendations"])
+
+def test_stream_reports_errors_per_line(client):
+    body = "\n".join([json.dumps(ROWS[0]), "{not json", "", "[1, 2]", json.dumps(ROWS[1])]) + "\n"
+    response = client.post("/api/predict/stream", params={"chunk_size": 2}, content=body)
+    assert response.status_code == 200
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["line"] for line in lines] == [1, 2, 4, 5]
+    assert lines[1]["error"].startswith("Invalid JSON")
+    assert lines[2]["error"] == "Expected a JSON object"
+    single = client.post("/api/predict", json=ROWS[1]).json()
+    assert [(rec["crop"], rec["score"]) for rec in lines[3]["recommendations"]] == \
+        [(rec["crop"], rec["score"]) for rec in single["recommendations"]]
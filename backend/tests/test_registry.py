@@ -0,0 +1,45 @@
+import pytest
+
+from app.ml.registry import ACTIVE_FILE, ModelRegistry
+
+def test_publish_and_activate(model, tmp_path):
+    registry = ModelRegistry(tmp_path / "registry")
+    first = registry.publish(model, {"note": "first"})
+    second = registry.publish(model)
+
+    assert (first, second) == ("v0001", "v0002")
+    assert registry.get_metadata(first)["note"] == "first"
+    assert [m["version"] for m in registry.list_versions()] == [first, second]
+    assert registry.active_version() is None
+
+    registry.set_active(first)
+    assert registry.active_version() == first
+    signature = registry.active_signature()
+    registry.set_active(second)
+    assert registry.active_version() == second
+    assert registry.active_signature() != signature
+
+    loaded = registry.active_model(engine="sklearn")
+    assert loaded.version == second and loaded.load_model()
+
+def test_activation_never_leaves_partial_files(model, tmp_path):
+    registry = ModelRegistry(tmp_path / "registry")
+    version = registry.publish(model)
+    registry.set_active(version)
+
+    with pytest.raises(KeyError):
+        registry.set_active("v9999")
+    assert registry.active_version() == version
+    assert sorted(path.name for path in registry.root.iterdir()) == [ACTIVE_FILE, version]
+
+def test_failed_publish_leaves_no_version(model, tmp_path, monkeypatch):
+    registry = ModelRegistry(tmp_path / "registry")
+
+    def broken_save():
+        raise OSError("disk full")
+
+    monkeypatch.setattr(model, "save_model", broken_save)
+    with pytest.raises(OSError):
+        registry.publish(model)
+    assert list(registry.root.iterdir()) == []
+    assert registry.list_versions() == []
@@ -0,0 +1,96 @@
+import asyncio
+
+from app.ml.scheduler import MicroBatchScheduler
+
+def test_concurrent_rows_share_one_batch():
+    calls = []
+
+    def predict_batch(rows):
+        calls.append(list(rows))
+        return [row * 10 for row in rows]
+
+    async def run():
+        scheduler = MicroBatchScheduler(predict_batch, window_ms=50, max_batch_size=64)
+        try:
+            return await asyncio.gather(*(scheduler.submit(i) for i in range(10)))
+        finally:
+            await scheduler.close()
+
+    assert asyncio.run(run()) == [i * 10 for i in range(10)]
+    assert calls == [list(range(10))]
+
+def test_batches_are_capped_at_max_batch_size():
+    sizes = []
+
+    async def predict_batch(rows):
+        sizes.append(len(rows))
+        return rows
+
+    async def run():
+        scheduler = MicroBatchScheduler(predict_batch, window_ms=50, max_batch_size=4)
+        try:
+            results = await asyncio.gather(*(scheduler.submit(i) for i in range(10)))
+            return results, scheduler.stats()
+        finally:
+            await scheduler.close()
+
+    results, stats = asyncio.run(run())
+    assert results == list(range(10))
+    assert max(sizes) <= 4 and sum(sizes) == 10
+    assert stats["rows"] == 10 and stats["batches"] == len(sizes)
+
+def test_failed_batch_fails_every_caller():
+    def predict_batch(rows):
+        raise RuntimeError("model unavailable")
+
+    async def run():
+        scheduler = MicroBatchScheduler(predict_batch, window_ms=5)
+        try:
+            return await asyncio.gather(*(scheduler.submit(i) for i in range(3)), return_exceptions=True)
+        finally:
+            await scheduler.close()
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+def test_close_cancels_queued_and_in_flight_rows():
+    async def run():
+        started = asyncio.Event()
+
+        async def predict_batch(rows):
+            started.set()
+            await asyncio.sleep(10)
+            return rows
+
+        scheduler = MicroBatchScheduler(predict_batch, window_ms=1, max_batch_size=2)
+        callers = [asyncio.create_task(scheduler.submit(i)) for i in range(5)]
+        await started.wait()
+        await scheduler.close()
+        return await asyncio.wait_for(asyncio.gather(*callers, return_exceptions=True), 1)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, asyncio.CancelledError) for result in results)
+
+def test_close_cancels_a_row_waiting_for_the_window():
+    async def run():
+        scheduler = MicroBatchScheduler(lambda rows: rows, window_ms=10000)
+        caller = asyncio.create_task(scheduler.submit(1))
+        await asyncio.sleep(0.01)
+        await scheduler.close()
+        return await asyncio.wait_for(asyncio.gather(caller, return_exceptions=True), 1)
+
+    assert isinstance(asyncio.run(run())[0], asyncio.CancelledError)
+
+def test_full_batch_does_not_wait_for_the_window():
+    async def run():
+        scheduler = MicroBatchScheduler(lambda rows: rows, window_ms=10000, max_batch_size=4)
+        try:
+            first = asyncio.create_task(scheduler.submit(0))
+            # The worker takes the first row and starts waiting for the window
+            await asyncio.sleep(0.01)
+            rest = [asyncio.create_task(scheduler.submit(i)) for i in range(1, 4)]
+            return await asyncio.wait_for(asyncio.gather(first, *rest), 1)
+        finally:
+            await scheduler.close()
+
+    assert asyncio.run(run()) == [0, 1, 2, 3]
@@ -0,0 +1,15 @@
+from app.ml.training import select_candidate
+
+CANDIDATES = [
+    {"params": {"n_estimators": 200}, "val_accuracy": 0.99, "latency_p99_ms": 12.0},
+    {"params": {"n_estimators": 100}, "val_accuracy": 0.98, "latency_p99_ms": 6.0},
+    {"params": {"n_estimators": 50}, "val_accuracy": 0.98, "latency_p99_ms": 4.0}
+]
+
+def test_most_accurate_candidate_within_budget_wins():
+    selected, within_budget = select_candidate(CANDIDATES, latency_budget_ms=10)
+    assert within_budget and selected["params"] == {"n_estimators": 50}
+
+def test_fastest_candidate_when_none_fits_the_budget():
+    selected, within_budget = select_candidate(CANDIDATES, latency_budget_ms=1)
+    assert not within_budget and selected["params"] == {"n_estimators": 50}
@@ -0,0 +1,67 @@
+import asyncio
+from collections import defaultdict
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+
+from app.db import WriteBehindQueue
+
+class FakeCollection:
+    def __init__(self):
+        self.documents = []
+        self.calls = 0
+        self.fail_ids = set()
+
+    async def insert_many(self, documents, ordered=True):
+        self.calls += 1
+        failed = [i for i, doc in enumerate(documents) if doc["_id"] in self.fail_ids]
+        self.documents.extend(doc for doc in documents if doc["_id"] not in self.fail_ids)
+        if failed:
+            raise BulkWriteError({"writeErrors": [{"index": i} for i in failed]})
+
+def test_stop_drains_every_queued_document():
+    database = defaultdict(FakeCollection)
+
+    async def run():
+        queue = WriteBehindQueue(database, max_queue=100, batch_size=10, flush_interval=0.05)
+        queue.start()
+        ids = [await queue.put("recommendations", {"n": i}) for i in range(25)]
+        ids.append(await queue.put("feedback", {"n": 25}))
+        await queue.stop()
+        return ids, queue.stats()
+
+    ids, stats = asyncio.run(run())
+    written = database["recommendations"].documents + database["feedback"].documents
+    assert [str(doc["_id"]) for doc in written] == ids
+    assert stats["flushed"] == 26 and stats["pending"] == 0 and stats["failed"] == 0
+
+def test_full_queue_applies_backpressure():
+    database = defaultdict(FakeCollection)
+
+    async def run():
+        queue = WriteBehindQueue(database, max_queue=2, batch_size=2, flush_interval=0.01)
+        queue.start()
+        for i in range(6):
+            await queue.put("recommendations", {"n": i})
+        await queue.stop()
+        return queue.stats()
+
+    stats = asyncio.run(run())
+    assert [doc["n"] for doc in database["recommendations"].documents] == list(range(6))
+    assert stats["backpressure_waits"] > 0
+
+def test_partial_bulk_failure_counts_only_failed_documents():
+    database = defaultdict(FakeCollection)
+    bad_id = ObjectId()
+    database["recommendations"].fail_ids.add(bad_id)
+
+    async def run():
+        queue = WriteBehindQueue(database, batch_size=10, flush_interval=0.05)
+        queue.start()
+        await queue.put("recommendations", {"_id": bad_id})
+        await queue.put("recommendations", {"n": 1})
+        await queue.stop()
+        return queue.stats()
+
+    stats = asyncio.run(run())
+    assert (stats["flushed"], stats["failed"]) == (1, 1)